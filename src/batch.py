@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import zipfile
+import tempfile
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config import Config
+from factory import ConverterFactory
+from converters.sniff import sniff, describe
+from storage import hold
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def expand_inputs(paths, work_dir: str):
+    """展开上传的文件列表，ZIP 包中的文件逐个解压到 work_dir
+
+    按文件内容识别 ZIP 包（不看扩展名），docx / xlsx / xmind 等 ZIP 格式的文档不解压；
+    扩展名为 .zip 但不是 ZIP 包的文件直接报错。
+    返回 [(显示名称, 文件路径)]，显示名称保留 ZIP 内的相对路径。
+    """
+    inputs = []
+    for path in paths:
+        file_type = sniff(path)
+        if file_type.ext != '.zip':
+            if path.lower().endswith('.zip'):
+                raise ValueError(f"{os.path.basename(path)} 不是有效的 ZIP 压缩包（识别为{describe(file_type)}）")
+            inputs.append((os.path.basename(path), path))
+            continue
+
+        with zipfile.ZipFile(path) as zf:
+            members = []
+            for info in zf.infolist():
+                name = info.filename.replace('\\', '/')
+                parts = [p for p in name.split('/') if p not in ('', '.')]
+                # 跳过目录、macOS 元数据以及试图逃逸解压目录的条目
+                if info.is_dir() or not parts or '..' in parts or parts[0] == '__MACOSX':
+                    continue
+                members.append((info, parts))
+            # 写入任何文件之前按中央目录检查限制
+            check_archive_limits(os.path.basename(path), [info for info, _ in members])
+
+            extract_dir = tempfile.mkdtemp(prefix='batch_', dir=work_dir)
+            budget = Config().BATCH_MAX_UNCOMPRESSED_BYTES
+            for info, parts in members:
+                target = os.path.join(extract_dir, *parts)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with zf.open(info) as src, open(target, 'wb') as dst:
+                    # 中央目录中的大小可以伪造，解压时按实际写入的字节数再检查一次
+                    budget -= _copy_limited(src, dst, info.file_size)
+                if budget < 0:
+                    raise ValueError(f"{os.path.basename(path)} 解压后超过大小限制")
+                inputs.append(('/'.join(parts), target))
+    return inputs
+
+
+def check_archive_limits(archive_name: str, members):
+    """ZIP 包的文件数、解压后总大小和压缩比超过 Config 中的限制时抛出 ValueError"""
+    config = Config()
+    if len(members) > config.BATCH_MAX_MEMBERS:
+        raise ValueError(f"{archive_name} 包含 {len(members)} 个文件，超过上限 {config.BATCH_MAX_MEMBERS}")
+    total = sum(info.file_size for info in members)
+    if total > config.BATCH_MAX_UNCOMPRESSED_BYTES:
+        raise ValueError(f"{archive_name} 解压后 {total / 1024 / 1024:.0f}MB，"
+                         f"超过上限 {config.BATCH_MAX_UNCOMPRESSED_BYTES / 1024 / 1024:.0f}MB")
+    for info in members:
+        if info.file_size > max(info.compress_size, 1) * config.BATCH_MAX_COMPRESSION_RATIO:
+            raise ValueError(f"{archive_name} 中的 {info.filename} 压缩比异常，拒绝解压")
+
+
+def _copy_limited(src, dst, declared_size: int) -> int:
+    """复制 ZIP 成员，实际大小超过声明的大小时抛出 ValueError，返回写入的字节数"""
+    written = 0
+    while True:
+        chunk = src.read(1024 * 1024)
+        if not chunk:
+            return written
+        written += len(chunk)
+        if written > declared_size:
+            raise ValueError("ZIP 成员的实际大小与声明不符，拒绝解压")
+        dst.write(chunk)
+
+
+def _unique_name(name: str, used: set) -> str:
+    base, ext = os.path.splitext(name)
+    candidate = name
+    index = 1
+    while candidate.lower() in used:
+        index += 1
+        candidate = f"{base}_{index}{ext}"
+    used.add(candidate.lower())
+    return candidate
+
+
+def run_batch(inputs, resolve, result_path: str, workers: int = None, options: dict = None) -> dict:
+    """并行转换多个文件，结果和清单写入同一个 ZIP
+
+    inputs: [(显示名称, 文件路径)]
+    resolve: resolve(显示名称, 文件路径) -> (转换类型, 输出扩展名, 错误信息)
+    options: 传给每次转换的转换选项
+    返回汇总信息 {'total', 'succeeded', 'failed', 'seconds'}
+    """
+    workers = workers or Config().BATCH_WORKERS or os.cpu_count() or 1
+    start = time.perf_counter()
+    manifest = []
+    used_names = {MANIFEST_NAME}
+
+    def convert_one(name, input_path, output_dir):
+        entry = {'file': name, 'converter_type': None, 'status': 'failed',
+                 'output': None, 'seconds': 0.0, 'error': None}
+        task_start = time.perf_counter()
+        try:
+            converter_type, output_ext, error = resolve(name, input_path)
+            if error:
+                entry['error'] = error
+                return entry, None
+            entry['converter_type'] = converter_type
+            output_path = os.path.join(output_dir, 'output' + output_ext)
+            if ConverterFactory.convert(converter_type, input_path, output_path, options=options):
+                entry['status'] = 'success'
+                entry['output'] = os.path.splitext(name)[0] + output_ext
+                return entry, output_path
+            entry['error'] = "转换失败"
+            return entry, None
+        except Exception as e:
+            entry['error'] = str(e)
+            return entry, None
+        finally:
+            entry['seconds'] = round(time.perf_counter() - task_start, 3)
+
+    with tempfile.TemporaryDirectory(prefix='batch_out_', dir=os.path.dirname(result_path)) as temp_dir, \
+            hold(temp_dir), \
+            zipfile.ZipFile(result_path, 'w', zipfile.ZIP_DEFLATED) as zf, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for index, (name, input_path) in enumerate(inputs):
+            output_dir = os.path.join(temp_dir, str(index))
+            os.makedirs(output_dir)
+            futures.append(pool.submit(convert_one, name, input_path, output_dir))
+
+        # 按完成顺序把结果写入压缩包，写完即删除中间文件
+        for future in as_completed(futures):
+            entry, output_path = future.result()
+            if output_path:
+                entry['output'] = _unique_name(entry['output'], used_names)
+                zf.write(output_path, entry['output'])
+                os.remove(output_path)
+            manifest.append(entry)
+
+        manifest.sort(key=lambda e: e['file'])
+        succeeded = sum(1 for e in manifest if e['status'] == 'success')
+        summary = {
+            'total': len(manifest),
+            'succeeded': succeeded,
+            'failed': len(manifest) - succeeded,
+            'seconds': round(time.perf_counter() - start, 3),
+        }
+        zf.writestr(MANIFEST_NAME, json.dumps(
+            {'summary': summary, 'files': manifest}, ensure_ascii=False, indent=2
+        ))
+
+    logger.info(f"批量转换完成: 成功 {summary['succeeded']}/{summary['total']}，耗时 {summary['seconds']}s")
+    return summary
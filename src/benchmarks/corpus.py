@@ -0,0 +1,153 @@
+"""可复现的测试语料生成
+
+同一个 profile 和 seed 总是生成相同内容的文件。
+
+用法（在 src 目录下执行）:
+    python -m benchmarks.corpus ./corpus --profile medium
+"""
+import os
+import sys
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks.xmind_reader import make_xmind
+from benchmarks.markdown_xmind import make_outline
+
+# 各语料规模的参数
+PROFILES = {
+    'small': {
+        'xmind': {'breadth': 5, 'depth': 3},
+        'workbook': {'sheets': 2, 'rows': 1000, 'cols': 10},
+        'csv': {'rows': 5000, 'cols': 10},
+        'markdown': {'breadth': 5, 'depth': 3},
+        'docx': {'sections': 10, 'paragraphs': 5},
+    },
+    'medium': {
+        'xmind': {'breadth': 8, 'depth': 4},
+        'workbook': {'sheets': 3, 'rows': 20000, 'cols': 20},
+        'csv': {'rows': 100000, 'cols': 20},
+        'markdown': {'breadth': 8, 'depth': 4},
+        'docx': {'sections': 50, 'paragraphs': 10},
+    },
+    'large': {
+        'xmind': {'breadth': 10, 'depth': 5},
+        'workbook': {'sheets': 5, 'rows': 100000, 'cols': 30},
+        'csv': {'rows': 1000000, 'cols': 20},
+        'markdown': {'breadth': 10, 'depth': 5},
+        'docx': {'sections': 200, 'paragraphs': 20},
+    },
+}
+
+
+def _cell(rng, col):
+    """按列生成不同类型的值：整数、浮点数、文本交替"""
+    kind = col % 3
+    if kind == 0:
+        return rng.randint(0, 1000000)
+    if kind == 1:
+        return round(rng.uniform(-1000, 1000), 4)
+    return f"文本{rng.randint(0, 99999)}"
+
+
+def make_workbook(path, sheets, rows, cols, seed=0):
+    """生成 sheets 个 rows×cols 的工作表，第一行为表头"""
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    for sheet in range(sheets):
+        worksheet = workbook.create_sheet(f"Sheet{sheet + 1}")
+        worksheet.append([f"列{col + 1}" for col in range(cols)])
+        for _ in range(rows):
+            worksheet.append([_cell(rng, col) for col in range(cols)])
+    workbook.save(path)
+
+
+def make_csv(path, rows, cols, seed=0):
+    import csv
+
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([f"列{col + 1}" for col in range(cols)])
+        for _ in range(rows):
+            writer.writerow([_cell(rng, col) for col in range(cols)])
+
+
+def make_docx(path, sections, paragraphs, seed=0):
+    """生成包含标题、正文（含粗体）、列表和表格的 Word 文档"""
+    from docx import Document
+
+    rng = random.Random(seed)
+    document = Document()
+    document.add_heading("测试文档", 0)
+    for section in range(1, sections + 1):
+        document.add_heading(f"第 {section} 节", 1)
+        for _ in range(paragraphs):
+            paragraph = document.add_paragraph(
+                " ".join(f"词{rng.randint(0, 9999)}" for _ in range(rng.randint(20, 80)))
+            )
+            paragraph.add_run(" 重点内容").bold = True
+        for item in range(3):
+            document.add_paragraph(f"列表项 {item + 1}", style='List Bullet')
+        if section % 5 == 0:
+            table = document.add_table(rows=4, cols=3)
+            for row in table.rows:
+                for cell in row.cells:
+                    cell.text = str(rng.randint(0, 1000))
+    document.save(path)
+
+
+def build_corpus(directory, profile='small', seed=0) -> dict:
+    """生成一套语料，返回 {扩展名: 文件路径}
+
+    缺少 openpyxl / python-docx 时跳过对应格式。
+    """
+    params = PROFILES[profile]
+    os.makedirs(directory, exist_ok=True)
+    corpus = {}
+
+    path = os.path.join(directory, f"{profile}.xmind")
+    make_xmind(path, **params['xmind'])
+    corpus['.xmind'] = path
+
+    path = os.path.join(directory, f"{profile}.md")
+    make_outline(path, **params['markdown'])
+    corpus['.md'] = path
+
+    path = os.path.join(directory, f"{profile}.csv")
+    make_csv(path, seed=seed, **params['csv'])
+    corpus['.csv'] = path
+
+    try:
+        path = os.path.join(directory, f"{profile}.xlsx")
+        make_workbook(path, seed=seed, **params['workbook'])
+        corpus['.xlsx'] = path
+    except ImportError:
+        pass
+
+    try:
+        path = os.path.join(directory, f"{profile}.docx")
+        make_docx(path, seed=seed, **params['docx'])
+        corpus['.docx'] = path
+    except ImportError:
+        pass
+
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成测试语料')
+    parser.add_argument('directory')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='small')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for ext, path in sorted(build_corpus(args.directory, args.profile, args.seed).items()):
+        print(f"{ext:<8} {os.path.getsize(path) / 1024:>10.1f} KB  {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Markdown 与 DOCX 往返校验和性能测试
+
+生成包含标题、段落和多级有序/无序列表的 Markdown，用原生写入器转换为 DOCX，
+再用 DocxToMarkdownConverter 的原生路径转回，校验两份 Markdown 完全一致。
+
+用法（在 src 目录下执行）:
+    python -m benchmarks.markdown_docx --sections 50
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from converters.document_converter import DocxToMarkdownConverter, MarkdownToDocxConverter
+
+
+def make_markdown(path, sections):
+    """生成测试 Markdown，每节包含段落、三级无序列表和两级有序列表"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for section in range(sections):
+            if section:
+                f.write("\n")
+            f.write(f"# 第 {section + 1} 节\n\n")
+            f.write(f"第 {section + 1} 节的正文段落，包含 **粗体** 和 *斜体*。\n\n")
+            for item in range(3):
+                f.write(f"- 要点 {item + 1}\n")
+                f.write(f"    - 子要点 {item + 1}.1\n")
+                f.write(f"        - 细节 {item + 1}.1.1\n")
+            # 列表之间用段落隔开；有序列表项统一写成 "1."，与 DocxToMarkdownConverter 的输出一致
+            f.write("\n操作步骤：\n\n")
+            for item in range(2):
+                f.write(f"1. 步骤 {item + 1}\n")
+                f.write(f"    1. 子步骤 {item + 1}.1\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Markdown 与 DOCX 往返校验')
+    parser.add_argument('--sections', type=int, default=50, help='生成的章节数')
+    args = parser.parse_args()
+
+    to_docx = MarkdownToDocxConverter().with_options(engine='native')
+    to_markdown = DocxToMarkdownConverter().with_options(engine='native')
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, 'source.md')
+        docx_path = os.path.join(temp_dir, 'roundtrip.docx')
+        result = os.path.join(temp_dir, 'result.md')
+        make_markdown(source, args.sections)
+
+        for name, converter, input_path, output_path in (
+            ('md_to_docx', to_docx, source, docx_path),
+            ('docx_to_md', to_markdown, docx_path, result),
+        ):
+            start = time.perf_counter()
+            if not converter.convert(input_path, output_path):
+                raise SystemExit(f"{name} 转换失败")
+            print(f"{name:<12} 耗时 {time.perf_counter() - start:8.3f}s")
+
+        with open(source, encoding='utf-8') as f1, open(result, encoding='utf-8') as f2:
+            expected, actual = f1.read(), f2.read()
+        if expected != actual:
+            for line_no, (a, b) in enumerate(zip(expected.splitlines(), actual.splitlines()), 1):
+                if a != b:
+                    raise SystemExit(f"往返结果不一致（第 {line_no} 行）: {a!r} != {b!r}")
+            raise SystemExit("往返结果不一致（行数不同）")
+        print("往返结果一致")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Markdown 转 XMind 性能测试与往返校验
+
+生成大纲 Markdown，转换为 XMind 后再用 XmindToMarkdownConverter 转回，
+校验两份 Markdown 完全一致。
+
+用法（在 src 目录下执行）:
+    python -m benchmarks.markdown_xmind --breadth 10 --depth 5
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from converters.xmind_converter import XmindToMarkdownConverter, MarkdownToXmindConverter
+
+
+def make_outline(path, breadth, depth):
+    """生成多画布的大纲 Markdown，返回标题数量"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for sheet in range(2):
+            f.write(f"# 画布 {sheet + 1}\n\n")
+            count += 1
+            stack = [(1, breadth)]
+            while stack:
+                level, remaining = stack.pop()
+                if remaining == 0:
+                    continue
+                stack.append((level, remaining - 1))
+                count += 1
+                f.write("#" * (level + 1) + f" 主题 {count}\n\n")
+                if count % 5 == 0:
+                    f.write(f"主题 {count} 的备注\n\n")
+                if level < depth:
+                    stack.append((level + 1, breadth))
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Markdown 转 XMind 性能测试')
+    parser.add_argument('--breadth', type=int, default=10, help='每个标题的子标题数')
+    parser.add_argument('--depth', type=int, default=5, help='标题层级深度')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        md_path = os.path.join(temp_dir, 'outline.md')
+        xmind_path = os.path.join(temp_dir, 'outline.xmind')
+        back_path = os.path.join(temp_dir, 'roundtrip.md')
+        total = make_outline(md_path, args.breadth, args.depth)
+        print(f"测试文件: {total} 个标题, {os.path.getsize(md_path) / 1024:.1f} KB")
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        ok = MarkdownToXmindConverter().convert(md_path, xmind_path)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"md_to_xmind    成功 {ok}  耗时 {elapsed:8.3f}s  峰值内存 {peak / 1024 / 1024:8.1f} MB")
+
+        XmindToMarkdownConverter().convert(xmind_path, back_path)
+        with open(md_path, encoding='utf-8') as a, open(back_path, encoding='utf-8') as b:
+            same = a.read() == b.read()
+        print(f"往返校验: {'一致' if same else '不一致'}")
+        if not same:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
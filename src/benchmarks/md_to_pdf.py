@@ -0,0 +1,78 @@
+"""Markdown 转 PDF 引擎对比：html（WeasyPrint）vs latex（pandoc + LaTeX）
+
+用法（在 src 目录下执行）:
+    python -m benchmarks.md_to_pdf --documents 20 --sections 10
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from factory import ConverterFactory
+from toolchain import get_toolchains
+from converters import markdown_pdf
+
+
+def make_document(path, sections, seed):
+    """生成包含标题、段落、列表、表格和代码块的典型文档"""
+    rng = random.Random(seed)
+    lines = [f"# 测试文档 {seed}", ""]
+    for section in range(1, sections + 1):
+        lines += [f"## 第 {section} 节", ""]
+        lines += [" ".join(f"内容{rng.randint(0, 999)}" for _ in range(rng.randint(20, 60))), ""]
+        lines += [f"- 列表项 {i}" for i in range(rng.randint(2, 6))] + [""]
+        if section % 3 == 0:
+            lines += ["| 名称 | 数量 | 说明 |", "| --- | --- | --- |"]
+            lines += [f"| 项目{i} | {rng.randint(1, 100)} | 说明文字 |" for i in range(5)] + [""]
+        if section % 4 == 0:
+            lines += ["```python", "def main():", "    return 42", "```", ""]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Markdown 转 PDF 引擎对比')
+    parser.add_argument('--documents', type=int, default=20)
+    parser.add_argument('--sections', type=int, default=10)
+    args = parser.parse_args()
+
+    engines = []
+    if markdown_pdf.available():
+        engines.append('html')
+    if get_toolchains().available('latex'):
+        engines.append('latex')
+    if not engines:
+        print("没有可用的引擎：html 需要 markdown 和 weasyprint，latex 需要 pandoc 和 LaTeX")
+        return
+
+    converter = ConverterFactory.get_converter('md_to_pdf')
+    with tempfile.TemporaryDirectory() as temp_dir:
+        documents = []
+        for index in range(args.documents):
+            path = os.path.join(temp_dir, f"doc{index}.md")
+            make_document(path, args.sections, index)
+            documents.append(path)
+
+        print(f"{'引擎':<8} {'文档数':>6} {'失败':>6} {'p50':>9} {'平均':>9} {'总耗时':>9}")
+        for engine in engines:
+            engine_converter = converter.with_options(engine=engine)
+            # 第一次转换包含导入和字体加载，不计入统计
+            engine_converter.convert(documents[0], os.path.join(temp_dir, 'warmup.pdf'))
+            timings = []
+            failures = 0
+            for path in documents:
+                start = time.perf_counter()
+                if not engine_converter.convert(path, path[:-3] + f'.{engine}.pdf'):
+                    failures += 1
+                timings.append(time.perf_counter() - start)
+            print(f"{engine:<8} {len(documents):>6} {failures:>6} {statistics.median(timings):>8.3f}s "
+                  f"{statistics.mean(timings):>8.3f}s {sum(timings):>8.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""启动耗时测试：统计 factory 以及每个转换器模块的导入耗时
+
+每次测量都在新的解释器进程中进行，避免模块缓存影响结果。
+
+用法（在 src 目录下执行）:
+    python -m benchmarks.startup --repeat 5
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, SRC_DIR)
+
+from factory import ConverterFactory
+
+_SNIPPET = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "print(time.perf_counter() - start, len(sys.modules))\n"
+)
+
+
+def measure_import(module: str, repeat: int):
+    """在新进程中导入模块，返回 (耗时中位数秒, 导入后已加载模块数)"""
+    timings = []
+    modules = 0
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-c', _SNIPPET.format(module=module)],
+            cwd=SRC_DIR, capture_output=True, text=True, check=True
+        )
+        seconds, modules = result.stdout.split()[-2:]
+        timings.append(float(seconds))
+    return statistics.median(timings), int(modules)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='转换器模块导入耗时')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    modules = {}
+    for name, descriptor in ConverterFactory._converters.items():
+        module = descriptor.target.partition(':')[0]
+        modules.setdefault(module, []).append(name)
+
+    print(f"{'模块':<36} {'导入耗时':>10} {'模块数':>8}  转换类型")
+    for module, names in [('factory', ['(启动)'])] + sorted(modules.items()):
+        seconds, count = measure_import(module, args.repeat)
+        print(f"{module:<36} {seconds * 1000:>8.1f}ms {count:>8}  {', '.join(names)}")
+
+
+if __name__ == '__main__':
+    main()
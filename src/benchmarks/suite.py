@@ -0,0 +1,208 @@
+"""所有已注册转换器的性能测试
+
+每个转换器在独立的子进程中运行，记录墙钟时间、CPU 时间、峰值内存和输出大小。
+依赖的 soffice / pandoc / LaTeX 不存在时跳过对应转换器。CPU 时间和峰值内存
+包含已结束的子进程（一次性 soffice、pandoc），不包含常驻的 LibreOffice 进程池。
+
+用法（在 src 目录下执行）:
+    python -m benchmarks.suite --profile small --output results.json
+    python -m benchmarks.suite --profile small --baseline results.json --threshold 0.2
+    python -m benchmarks.suite --compare old.json new.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, SRC_DIR)
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# 参与回归比较的指标，以及忽略噪声的绝对差值下限
+COMPARED_METRICS = {
+    'wall_seconds': 0.005,
+    'cpu_seconds': 0.005,
+    'peak_rss_mb': 5.0,
+}
+
+
+def _cpu_seconds() -> float:
+    if resource is None:
+        return time.process_time()
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
+def _peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    # Linux 下 ru_maxrss 单位为 KB，macOS 下为字节
+    scale = 1024 * 1024 if platform.system() == 'Darwin' else 1024
+    return max(resource.getrusage(who).ru_maxrss
+               for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)) / scale
+
+
+def run_worker(converter_type, input_path, output_path, repeat):
+    """在子进程中执行：直接调用转换器（不经过结果缓存和进程池）"""
+    from factory import ConverterFactory
+
+    start = time.perf_counter()
+    converter = ConverterFactory.get_converter(converter_type)
+    walls, cpus = [], []
+    for index in range(repeat + 1):
+        wall, cpu = time.perf_counter(), _cpu_seconds()
+        if not converter.convert(input_path, output_path):
+            return {'error': '转换失败'}
+        wall, cpu = time.perf_counter() - wall, _cpu_seconds() - cpu
+        if index == 0:
+            # 第一次包含模块导入和工具启动，单独记录
+            first_seconds = time.perf_counter() - start
+        else:
+            walls.append(wall)
+            cpus.append(cpu)
+    return {
+        'first_seconds': round(first_seconds, 4),
+        'wall_seconds': round(statistics.median(walls), 4),
+        'cpu_seconds': round(statistics.median(cpus), 4),
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+        'input_bytes': os.path.getsize(input_path),
+        'output_bytes': os.path.getsize(output_path),
+    }
+
+
+def run_suite(profile, repeat, work_dir, only=None) -> dict:
+    from factory import ConverterFactory
+    from toolchain import get_toolchains
+    from benchmarks.corpus import build_corpus
+
+    corpus = build_corpus(os.path.join(work_dir, 'corpus'), profile)
+    results = {}
+    for converter_type, descriptor in sorted(ConverterFactory._converters.items()):
+        if only and converter_type not in only:
+            continue
+        input_path = next((corpus[fmt] for fmt in descriptor.input_formats if fmt in corpus), None)
+        if not get_toolchains().available(descriptor.toolchain):
+            result = {'skipped': f"未检测到 {descriptor.toolchain}"}
+        elif input_path is None:
+            result = {'skipped': '没有对应格式的测试文件'}
+        else:
+            result = None
+        if result is not None:
+            results[converter_type] = result
+            print_result(converter_type, result)
+            continue
+
+        output_path = os.path.join(work_dir, f"{converter_type}{descriptor.output_formats[0]}")
+        process = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.suite', '--worker',
+             converter_type, input_path, output_path, str(repeat)],
+            cwd=SRC_DIR, capture_output=True, text=True
+        )
+        try:
+            result = json.loads(process.stdout.strip().splitlines()[-1])
+        except (IndexError, ValueError):
+            result = {'error': (process.stderr.strip().splitlines() or ['子进程异常退出'])[-1]}
+        result['input'] = os.path.basename(input_path)
+        results[converter_type] = result
+        print_result(converter_type, result)
+    return results
+
+
+def print_result(converter_type, result):
+    if 'skipped' in result or 'error' in result:
+        print(f"{converter_type:<16} {'跳过' if 'skipped' in result else '失败'}: "
+              f"{result.get('skipped') or result.get('error')}")
+        return
+    print(f"{converter_type:<16} 墙钟 {result['wall_seconds']:>8.3f}s  CPU {result['cpu_seconds']:>8.3f}s  "
+          f"首次 {result['first_seconds']:>7.3f}s  内存 {result['peak_rss_mb']:>7.1f}MB  "
+          f"输出 {result['output_bytes'] / 1024:>9.1f}KB")
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """返回超过阈值的退化项 [(转换类型, 指标, 基准值, 当前值)]"""
+    regressions = []
+    for converter_type, result in sorted(current['results'].items()):
+        old = baseline['results'].get(converter_type)
+        if not old or 'wall_seconds' not in old or 'wall_seconds' not in result:
+            continue
+        for metric, noise in COMPARED_METRICS.items():
+            before, after = old[metric], result[metric]
+            if after > before * (1 + threshold) and after - before > noise:
+                regressions.append((converter_type, metric, before, after))
+    return regressions
+
+
+def report_regressions(baseline, current, threshold) -> int:
+    if baseline.get('profile') != current.get('profile'):
+        print(f"警告: 语料规模不同（{baseline.get('profile')} / {current.get('profile')}）")
+    regressions = compare(baseline, current, threshold)
+    if not regressions:
+        print(f"没有超过 {threshold:.0%} 的性能退化")
+        return 0
+    print(f"性能退化（阈值 {threshold:.0%}）:")
+    for converter_type, metric, before, after in regressions:
+        print(f"  {converter_type:<16} {metric:<14} {before:>10} -> {after:<10} (+{(after / before - 1):.0%})"
+              if before else f"  {converter_type:<16} {metric:<14} {before:>10} -> {after}")
+    return 1
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        converter_type, input_path, output_path, repeat = sys.argv[2:6]
+        print(json.dumps(run_worker(converter_type, input_path, output_path, int(repeat))))
+        return 0
+
+    from benchmarks.corpus import PROFILES
+
+    parser = argparse.ArgumentParser(description='转换器性能测试')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='small')
+    parser.add_argument('--repeat', type=int, default=3, help='每个转换器重复次数（不含首次）')
+    parser.add_argument('--converter', action='append', help='只测试指定的转换类型，可重复')
+    parser.add_argument('--output', help='结果保存为 JSON')
+    parser.add_argument('--baseline', help='与基准结果比较，退化超过阈值时返回非零')
+    parser.add_argument('--threshold', type=float, default=0.2, help='退化阈值，0.2 表示 20%%')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help='只比较两份已有结果，不运行测试')
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.compare[1], 'r', encoding='utf-8') as f:
+            current = json.load(f)
+        return report_regressions(baseline, current, args.threshold)
+
+    with tempfile.TemporaryDirectory(prefix='benchmark_') as work_dir:
+        results = run_suite(args.profile, max(args.repeat, 1), work_dir, args.converter)
+    current = {
+        'profile': args.profile,
+        'repeat': args.repeat,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            return report_regressions(json.load(f), current, args.threshold)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""XMind 读取性能对比：内置流式读取器 vs xmindparser
+
+用法（在 src 目录下执行）:
+    python -m benchmarks.xmind_reader --breadth 10 --depth 5
+    python -m benchmarks.xmind_reader --format legacy
+
+计时前先用小文件核对读取结果（Zen 的两种键顺序和旧版 content.xml）。
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import zipfile
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from converters.xmind_reader import XmindTopic, iter_topics
+
+
+def _build_topic(counter, breadth, depth, title_last=False):
+    counter[0] += 1
+    topic = {'id': str(counter[0]), 'class': 'topic'}
+    if not title_last:
+        topic['title'] = f'主题 {counter[0]}'
+    if counter[0] % 7 == 0:
+        topic['notes'] = {'plain': {'content': f'备注 {counter[0]}'}}
+    if depth > 0:
+        topic['children'] = {
+            'attached': [_build_topic(counter, breadth, depth - 1, title_last) for _ in range(breadth)]
+        }
+    if title_last:
+        topic['title'] = f'主题 {counter[0]}'
+    return topic
+
+
+def _expected_topics(topic, depth=0):
+    notes = topic.get('notes', {}).get('plain', {}).get('content')
+    yield XmindTopic(0, depth, topic['title'], notes, ())
+    for child in topic.get('children', {}).get('attached', ()):
+        yield from _expected_topics(child, depth + 1)
+
+
+def _topic_xml(topic):
+    parts = [f'<topic id="{topic["id"]}"><title>{escape(topic["title"])}</title>']
+    if 'notes' in topic:
+        parts.append(f'<notes><plain>{escape(topic["notes"]["plain"]["content"])}</plain></notes>')
+    children = topic.get('children', {}).get('attached')
+    if children:
+        parts.append('<children><topics type="attached">')
+        parts.extend(_topic_xml(child) for child in children)
+        parts.append('</topics></children>')
+    parts.append('</topic>')
+    return ''.join(parts)
+
+
+def make_xmind(path, breadth, depth, fmt='zen', title_last=False):
+    """生成测试文件（zen 为 content.json，legacy 为旧版 content.xml），返回根主题"""
+    counter = [0]
+    root = _build_topic(counter, breadth, depth, title_last)
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        if fmt == 'legacy':
+            zf.writestr('content.xml', (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                '<xmap-content xmlns="urn:xmind:xmap:xmlns:content:2.0">'
+                f'<sheet id="sheet-1">{_topic_xml(root)}<title>Sheet 1</title></sheet>'
+                '</xmap-content>'
+            ))
+            zf.writestr('META-INF/manifest.xml', '<manifest/>')
+            return root
+        content = [{'id': 'sheet-1', 'class': 'sheet', 'title': 'Sheet 1', 'rootTopic': root}]
+        zf.writestr('content.json', json.dumps(content, ensure_ascii=False))
+        zf.writestr('metadata.json', '{}')
+        zf.writestr('manifest.json', json.dumps(
+            {'file-entries': {'content.json': {}, 'metadata.json': {}}}
+        ))
+    return root
+
+
+def check(temp_dir):
+    """核对各种格式和键顺序下读取到的主题与原始主题树一致"""
+    for fmt, title_last in (('zen', False), ('zen', True), ('legacy', False)):
+        path = os.path.join(temp_dir, f'check_{fmt}_{int(title_last)}.xmind')
+        root = make_xmind(path, 3, 3, fmt, title_last)
+        if list(iter_topics(path)) != list(_expected_topics(root)):
+            raise SystemExit(f"读取结果不一致: {fmt}{'（title 在 children 之后）' if title_last else ''}")
+    print("读取结果核对通过")
+
+
+def _count_xmindparser(path):
+    import xmindparser
+
+    def count(topic):
+        total = 0
+        stack = [topic]
+        while stack:
+            node = stack.pop()
+            total += 1
+            stack.extend(node.get('topics', ()))
+        return total
+
+    return sum(count(sheet['topic']) for sheet in xmindparser.xmind_to_dict(path))
+
+
+def _count_reader(path):
+    return sum(1 for _ in iter_topics(path))
+
+
+def measure(func, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='XMind 读取性能对比')
+    parser.add_argument('--breadth', type=int, default=10, help='每个主题的子主题数')
+    parser.add_argument('--depth', type=int, default=5, help='主题树深度')
+    parser.add_argument('--format', choices=['zen', 'legacy'], default='zen', help='测试文件格式')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        check(temp_dir)
+        path = os.path.join(temp_dir, 'bench.xmind')
+        make_xmind(path, args.breadth, args.depth, args.format)
+        total = sum(args.breadth ** level for level in range(args.depth + 1))
+        print(f"测试文件: {total} 个主题, {os.path.getsize(path) / 1024:.1f} KB")
+
+        candidates = [('xmind_reader', _count_reader)]
+        try:
+            import xmindparser  # noqa: F401
+            candidates.append(('xmindparser', _count_xmindparser))
+        except ImportError:
+            print("未安装 xmindparser，跳过对比")
+
+        for name, func in candidates:
+            count, elapsed, peak = measure(func, path)
+            print(f"{name:<14} 主题数 {count:>8}  耗时 {elapsed:8.3f}s  峰值内存 {peak / 1024 / 1024:8.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
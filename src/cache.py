@@ -0,0 +1,203 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+
+from config import Config
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(file_path: str) -> str:
+    """计算文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ConversionCache:
+    """按内容寻址的转换结果缓存
+
+    键为 (输入文件 SHA-256, 转换类型, 转换器版本/选项, 输出扩展名)，
+    结果保存在磁盘上，按总大小进行 LRU 淘汰。
+    相同的请求正在转换时，后到的请求等待其结果而不是重复转换。
+    """
+
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        if not os.path.exists(index_path):
+            return
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except Exception as e:
+            logger.warning(f"缓存索引读取失败，将重建: {str(e)}")
+            return
+        # 索引按最近使用顺序保存，丢弃文件已不存在的条目
+        for key, entry in entries:
+            if os.path.exists(os.path.join(self.cache_dir, entry['file'])):
+                self._entries[key] = entry
+                self._total_bytes += entry['size']
+
+    def _save_index(self):
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        temp_path = index_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(list(self._entries.items()), f)
+        os.replace(temp_path, index_path)
+
+    def make_key(self, converter_type: str, converter, input_path: str, output_path: str) -> str:
+        options = json.dumps(converter.get_options(), sort_keys=True, default=str)
+        parts = [
+            file_sha256(input_path),
+            converter_type,
+            str(getattr(converter, 'version', '')),
+            options,
+            os.path.splitext(output_path)[1].lower(),
+        ]
+        return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+    def _lookup(self, key: str):
+        """返回缓存文件路径并标记为最近使用，调用方需持有锁"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return os.path.join(self.cache_dir, entry['file'])
+
+    def _discard(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._total_bytes -= entry['size']
+
+    def _store(self, key: str, output_path: str):
+        size = os.path.getsize(output_path)
+        if size > self.max_bytes:
+            return
+        file_name = key + os.path.splitext(output_path)[1].lower()
+        cached_path = os.path.join(self.cache_dir, file_name)
+        temp_path = cached_path + '.tmp'
+        shutil.copyfile(output_path, temp_path)
+        os.replace(temp_path, cached_path)
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old['size']
+            self._entries[key] = {'file': file_name, 'size': size}
+            self._total_bytes += size
+            self._evict()
+            self._save_index()
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, entry = self._entries.popitem(last=False)
+            self._total_bytes -= entry['size']
+            try:
+                os.remove(os.path.join(self.cache_dir, entry['file']))
+            except OSError:
+                pass
+            logger.info(f"缓存淘汰: {entry['file']}")
+
+    def convert(self, converter_type: str, converter, input_path: str, output_path: str,
+                run=None) -> bool:
+        """优先返回缓存结果，未命中时执行转换并写入缓存
+
+        run 为可选的实际转换函数 run(input_path, output_path)，默认调用 converter.convert。
+        """
+        key = self.make_key(converter_type, converter, input_path, output_path)
+
+        while True:
+            with self._lock:
+                cached_path = self._lookup(key)
+            if cached_path is not None:
+                try:
+                    shutil.copyfile(cached_path, output_path)
+                except FileNotFoundError:
+                    # 文件已被淘汰或删除，按未命中处理
+                    self._discard(key)
+                    continue
+                with self._lock:
+                    self.hits += 1
+                return True
+
+            with self._lock:
+                event = self._inflight.get(key)
+                if event is None:
+                    event = threading.Event()
+                    self._inflight[key] = event
+                    self.misses += 1
+                    break
+            # 相同的转换正在进行，等待其完成后重新查缓存
+            event.wait()
+
+        try:
+            result = (run or converter.convert)(input_path, output_path)
+            if result and os.path.exists(output_path):
+                try:
+                    self._store(key, output_path)
+                except Exception as e:
+                    logger.warning(f"写入转换缓存失败: {str(e)}")
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_conversion_cache():
+    """获取全局转换结果缓存，禁用时返回 None"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            config = Config()
+            if not config.CACHE_ENABLED:
+                return None
+            _cache = ConversionCache(config.CACHE_DIR, config.CACHE_MAX_BYTES)
+        return _cache
+
+
+def _cache_stat(name):
+    return lambda: _cache.stats()[name] if _cache else None
+
+
+metrics.REGISTRY.register(metrics.Gauge(
+    'filemaster_cache_hits', '转换缓存命中次数（进程启动以来）', _cache_stat('hits')))
+metrics.REGISTRY.register(metrics.Gauge(
+    'filemaster_cache_misses', '转换缓存未命中次数（进程启动以来）', _cache_stat('misses')))
+metrics.REGISTRY.register(metrics.Gauge(
+    'filemaster_cache_bytes', '转换缓存占用的字节数', _cache_stat('bytes')))
@@ -0,0 +1,228 @@
+"""命令行批量转换工具
+
+递归转换目录树中的文件，已是最新的输出会被跳过（按修改时间或内容哈希判断）。
+
+示例:
+    python src/cli.py docs/ out/ --to .pdf --from .docx -j 8
+    python src/cli.py maps/ out/ --to .md --check hash
+"""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config import Config
+from factory import ConverterFactory
+from cache import file_sha256
+from converters.workbook_probe import probe_sheet_names
+from converters.sniff import real_format
+
+STATE_FILE = '.filemaster-state.json'
+
+
+def percentile(values, pct):
+    """最近秩法计算百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def scan_tree(src_dir, input_formats):
+    """遍历目录树，返回 [(相对路径, 绝对路径)]"""
+    for root, dirs, files in os.walk(src_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in input_formats:
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, src_dir), path
+
+
+class IncrementalState:
+    """记录每个输入文件上次转换时的大小、修改时间和内容哈希"""
+
+    def __init__(self, dst_dir):
+        self.path = os.path.join(dst_dir, STATE_FILE)
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except Exception:
+                self.entries = {}
+
+    def is_unchanged(self, rel_path, input_path, output_format):
+        """上次成功转换为 output_format 后输入文件的大小和修改时间都没变，且输出仍然存在
+
+        只需要一次 stat，不识别格式也不选择路径，重复运行时未修改的文件直接跳过。
+        """
+        entry = self.entries.get(rel_path)
+        if not entry or entry.get('format') != output_format or not os.path.exists(entry['output']):
+            return False
+        stat = os.stat(input_path)
+        return entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns
+
+    def is_up_to_date(self, rel_path, input_path, output_path, check):
+        if not os.path.exists(output_path):
+            return False
+        stat = os.stat(input_path)
+        if check == 'mtime':
+            return os.stat(output_path).st_mtime_ns >= stat.st_mtime_ns
+
+        entry = self.entries.get(rel_path)
+        if not entry or entry.get('output') != output_path:
+            return False
+        # 大小和修改时间未变时不必重新计算哈希
+        if entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return True
+        return entry['sha256'] == file_sha256(input_path)
+
+    def record(self, rel_path, input_path, output_path, output_format):
+        stat = os.stat(input_path)
+        entry = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': file_sha256(input_path),
+            'output': output_path,
+            'format': output_format,
+        }
+        with self._lock:
+            self.entries[rel_path] = entry
+
+    def save(self):
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+
+def plan_output(input_path, dst_path, output_format):
+    """确定转换路径和实际输出文件（多表格 Excel 转 CSV 输出为 ZIP）"""
+    input_format = real_format(input_path)
+    route = ConverterFactory.route(input_format, output_format, os.path.getsize(input_path))
+    output_path = os.path.splitext(dst_path)[0] + output_format
+    if route == ['excel_to_csv'] and len(probe_sheet_names(input_path)) > 1:
+        output_path = os.path.splitext(dst_path)[0] + '.zip'
+    return route, output_path
+
+
+def convert_one(route, input_path, output_path, profile=False):
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    if len(route) == 1:
+        return ConverterFactory.convert(route[0], input_path, output_path, profile=profile)
+    return ConverterFactory.convert_to(input_path, output_path, profile=profile)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='FileMaster 命令行批量转换')
+    parser.add_argument('src', help='输入目录')
+    parser.add_argument('dst', help='输出目录')
+    parser.add_argument('--to', required=True, dest='output_format', help='目标格式，例如 .pdf')
+    parser.add_argument('--from', dest='input_formats', action='append',
+                        help='只转换指定格式的文件，可重复，例如 --from .docx --from .doc')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='并行任务数')
+    parser.add_argument('--check', choices=['mtime', 'hash'], default='mtime',
+                        help='判断输出是否最新的方式')
+    parser.add_argument('--force', action='store_true', help='忽略已有输出，全部重新转换')
+    parser.add_argument('--no-cache', action='store_true', help='不使用转换结果缓存')
+    parser.add_argument('--profile', action='store_true',
+                        help='对每个文件做性能分析，结果保存到 PROFILES_DIR（同一时刻只分析一个文件）')
+    args = parser.parse_args(argv)
+
+    output_format = '.' + args.output_format.lower().lstrip('.')
+    if args.input_formats:
+        input_formats = {'.' + fmt.lower().lstrip('.') for fmt in args.input_formats}
+    else:
+        # 所有能转换为目标格式的输入格式
+        graph = ConverterFactory._graph or ConverterFactory._build_graph()
+        input_formats = set()
+        for fmt in graph:
+            if fmt == output_format:
+                continue
+            try:
+                ConverterFactory.route(fmt, output_format)
+                input_formats.add(fmt)
+            except ValueError:
+                pass
+
+    config = Config()
+    config.PROCESS_POOL_SIZE = args.jobs
+    if args.no_cache:
+        config.CACHE_ENABLED = False
+
+    src_dir = os.path.abspath(args.src)
+    dst_dir = os.path.abspath(args.dst)
+    os.makedirs(dst_dir, exist_ok=True)
+    state = IncrementalState(dst_dir)
+
+    tasks = []
+    skipped = 0
+    failed = []
+    for rel_path, input_path in scan_tree(src_dir, input_formats):
+        if not args.force and state.is_unchanged(rel_path, input_path, output_format):
+            skipped += 1
+            continue
+        try:
+            route, output_path = plan_output(input_path, os.path.join(dst_dir, rel_path), output_format)
+        except ValueError as e:
+            failed.append((rel_path, str(e)))
+            continue
+        if not args.force and state.is_up_to_date(rel_path, input_path, output_path, args.check):
+            skipped += 1
+            continue
+        tasks.append((rel_path, input_path, output_path, route))
+
+    print(f"待转换 {len(tasks)} 个文件，跳过 {skipped} 个已是最新的文件")
+
+    timings = {}
+    total_bytes = 0
+    succeeded = 0
+    start = time.perf_counter()
+
+    def run(task):
+        rel_path, input_path, output_path, route = task
+        task_start = time.perf_counter()
+        try:
+            result, error = convert_one(route, input_path, output_path, args.profile), '转换失败'
+        except Exception as e:
+            result, error = False, str(e)
+        return task, result, error, time.perf_counter() - task_start
+
+    with ThreadPoolExecutor(max_workers=max(args.jobs, 1)) as pool:
+        futures = [pool.submit(run, task) for task in tasks]
+        for future in as_completed(futures):
+            (rel_path, input_path, output_path, route), result, error, seconds = future.result()
+            name = '>'.join(route)
+            if result:
+                succeeded += 1
+                total_bytes += os.path.getsize(input_path)
+                timings.setdefault(name, []).append(seconds)
+                state.record(rel_path, input_path, output_path, output_format)
+                print(f"[成功] {rel_path} ({seconds:.2f}s)")
+            else:
+                failed.append((rel_path, error))
+                print(f"[失败] {rel_path}")
+
+    state.save()
+    elapsed = time.perf_counter() - start
+
+    print()
+    print(f"完成 {succeeded} 个，失败 {len(failed)} 个，跳过 {skipped} 个，耗时 {elapsed:.2f}s")
+    if succeeded and elapsed > 0:
+        print(f"吞吐量: {succeeded / elapsed:.2f} 文件/s, {total_bytes / 1024 / 1024 / elapsed:.2f} MB/s")
+    for name, values in sorted(timings.items()):
+        print(f"  {name:<28} {len(values):>6} 个  p50 {percentile(values, 50):7.3f}s  "
+              f"p95 {percentile(values, 95):7.3f}s")
+    for rel_path, error in failed:
+        print(f"[失败] {rel_path}: {error}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
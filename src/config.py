@@ -28,7 +28,100 @@ class Config:
             'excel_to_csv': {'input': ['.xls', '.xlsx'], 'output': '.csv'},
             # ... 其他转换类型配置
         }
-        
+
+        # LibreOffice 常驻进程池（0 表示禁用，每次转换启动独立的 soffice 进程）
+        self.SOFFICE_POOL_SIZE = 2
+        # 单个工作进程处理多少个任务后回收，限制内存增长
+        self.SOFFICE_MAX_JOBS_PER_WORKER = 50
+        # 单个转换任务的超时时间（秒），超时的工作进程会被重启
+        self.SOFFICE_JOB_TIMEOUT = 120
+        self.SOFFICE_STARTUP_TIMEOUT = 30
+        # 同时运行的一次性 soffice 进程上限（None 表示按 CPU 核数）
+        self.SOFFICE_MAX_PARALLEL = None
+
+        # 转换结果缓存（按输入内容寻址，LRU 淘汰）
+        self.CACHE_ENABLED = True
+        self.CACHE_DIR = "./data/cache"
+        self.CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+        # CSV 转 Excel 时分块读取的内存预算（字节）
+        self.CSV_TO_EXCEL_MEMORY_BUDGET = 64 * 1024 * 1024
+
+        # 后台转换任务队列
+        self.JOBS_DIR = "./data/jobs"
+        self.JOB_WORKERS = 4
+        # 排队任务上限，超过后提示服务器繁忙
+        self.JOB_QUEUE_SIZE = 32
+        # 各转换类型同时运行的任务上限，未列出的类型只受 JOB_WORKERS 限制
+        self.JOB_TYPE_LIMITS = {
+            'docx_to_pdf': 2,
+            'excel_to_pdf': 2,
+            'md_to_pdf': 2,
+            'batch': 1,
+        }
+        # 结束的任务在内存中保留的时间（秒），之后只能从 JOBS_DIR 中的状态文件查询
+        self.JOB_RETENTION_SECONDS = 3600
+        # 页面自动刷新任务状态的间隔（秒）
+        self.JOB_POLL_INTERVAL = 1
+
+        # CPU 密集型转换器在独立进程池中执行，避免阻塞 Web 进程
+        self.PROCESS_POOL_TYPES = ['excel_to_csv', 'csv_to_excel', 'xmind_to_md', 'md_to_xmind']
+        # 进程数（None 表示按 CPU 核数）
+        self.PROCESS_POOL_SIZE = None
+        self.PROCESS_TASK_TIMEOUT = 300
+        # 工作进程峰值内存超过此值（MB）时结束该进程，需要时重新启动
+        self.PROCESS_MAX_RSS_MB = 1024
+        # 小于此大小的文件直接在当前进程转换
+        self.PROCESS_MIN_FILE_BYTES = 256 * 1024
+
+        # 批量转换的并行任务数（None 表示按 CPU 核数）
+        self.BATCH_WORKERS = None
+        # 上传的 ZIP 包解压限制：文件数、解压后总大小、单个文件的压缩比
+        self.BATCH_MAX_MEMBERS = 1000
+        self.BATCH_MAX_UNCOMPRESSED_BYTES = 1024 * 1024 * 1024
+        self.BATCH_MAX_COMPRESSION_RATIO = 100
+
+        # DOCX 转 Markdown 引擎：auto（原生优先，遇到脚注、公式等改用 pandoc）、native、pandoc
+        self.DOCX_TO_MD_ENGINE = 'auto'
+        # Markdown 转 Word 引擎：auto（原生优先，遇到代码块、图片等改用 pandoc）、native、pandoc
+        self.MD_TO_DOCX_ENGINE = 'auto'
+        # Markdown 转 Word 使用的参考模板（.docx），None 表示 python-docx 默认模板
+        self.MD_TO_DOCX_TEMPLATE = None
+        # Markdown 转 PDF 引擎：auto（已安装 WeasyPrint 时用 html）、html、latex
+        self.MD_TO_PDF_ENGINE = 'auto'
+        # html 引擎追加的样式表路径，None 表示只使用内置样式
+        self.MD_TO_PDF_CSS = None
+
+        # 是否加载通过 entry point（filemaster.converters）安装的第三方转换器
+        self.LOAD_CONVERTER_PLUGINS = True
+
+        # 外部工具路径，未配置时自动查找，例如 {'soffice': '/opt/libreoffice/program/soffice'}
+        self.TOOLCHAIN_PATHS = {}
+        # Web 服务启动时对每种工具执行一次小文件转换，预热进程和依赖
+        self.WARM_UP_ON_STARTUP = True
+
+        # 在 Web 应用的 /metrics 以 Prometheus 文本格式提供运行指标
+        self.METRICS_ENABLED = True
+        # Gradio 4 之前的版本无法挂载路由，改在此地址单独提供 /metrics
+        self.METRICS_HOST = '0.0.0.0'
+        self.METRICS_PORT = 7861
+
+        # 转换性能分析（cProfile + tracemalloc），结果保存到 PROFILES_DIR
+        # PROFILE_CONVERSIONS 为 True 时分析每次转换，否则按 PROFILE_SAMPLE_RATE 抽样（0 表示关闭）
+        self.PROFILE_CONVERSIONS = False
+        self.PROFILE_SAMPLE_RATE = 0.0
+        self.PROFILES_DIR = "./data/profiles"
+
+        # 数据目录清理：每 RETENTION_INTERVAL 秒检查一次（None 表示不清理），
+        # 删除超过 ttl 秒的文件，目录总大小超过 max_bytes 时从最旧的文件开始删除，None 表示不限制
+        self.RETENTION_INTERVAL = 600
+        self.RETENTION_POLICIES = {
+            'input': {'ttl': 24 * 3600, 'max_bytes': 5 * 1024 * 1024 * 1024},
+            'output': {'ttl': 24 * 3600, 'max_bytes': 5 * 1024 * 1024 * 1024},
+            'temp': {'ttl': 6 * 3600, 'max_bytes': 2 * 1024 * 1024 * 1024},
+            'jobs': {'ttl': 7 * 24 * 3600, 'max_bytes': None},
+        }
+
         self._ensure_directories()
     
     def _ensure_directories(self):
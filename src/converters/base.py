@@ -1,6 +1,20 @@
+import os
+import copy
+import shutil
+import tempfile
 from abc import ABC, abstractmethod
 
+from .sniff import sniff, matches
+import metrics
+
 class BaseConverter(ABC):
+    # 转换逻辑改变输出结果时递增，使旧的缓存结果失效
+    version = '1'
+    # 是否原生实现了 convert_stream（不经过临时文件）
+    supports_stream = False
+    # 依赖的外部工具链（'soffice' / 'pandoc' / 'latex'），纯 Python 实现为 None
+    toolchain = None
+
     def __init__(self):
         self.supported_input_formats = []
         self.supported_output_formats = []
@@ -10,5 +24,52 @@ class BaseConverter(ABC):
         pass
     
     def validate_format(self, file_path: str, is_input: bool = True) -> bool:
+        """检查文件格式是否受支持
+
+        已存在的输入文件按内容识别真实格式（不看扩展名），其余情况检查扩展名。
+        """
         formats = self.supported_input_formats if is_input else self.supported_output_formats
+        if is_input and os.path.isfile(file_path):
+            return matches(sniff(file_path), formats, os.path.splitext(file_path)[1].lower())
         return any(file_path.lower().endswith(fmt) for fmt in formats)
+
+    @staticmethod
+    def record_error(error: Exception):
+        """转换器捕获异常并返回 False 时调用，失败指标按真实的异常类型统计"""
+        metrics.record_error(error)
+
+    def get_options(self) -> dict:
+        """影响输出结果的转换选项，作为结果缓存键的一部分"""
+        return {}
+
+    def with_options(self, **options):
+        """返回设置了转换选项的副本，共享的转换器实例不受影响
+
+        选项名必须出现在 get_options() 中，并对应同名属性。
+        """
+        supported = self.get_options()
+        converter = copy.copy(self)
+        for name, value in options.items():
+            if name not in supported:
+                raise ValueError(f"{type(self).__name__} 不支持转换选项: {name}")
+            setattr(converter, name, value)
+        return converter
+
+    def convert_stream(self, source, sink, input_format: str = None) -> bool:
+        """从可读的二进制对象转换到可写的二进制对象
+
+        input_format 为输入的真实格式（例如 '.xls'），临时文件按它命名，默认取第一个支持的输入格式。
+        默认实现借助临时文件调用 convert()，能直接处理内存数据的转换器应覆盖此方法。
+        """
+        input_ext = input_format or (self.supported_input_formats[0] if self.supported_input_formats else '')
+        output_ext = self.supported_output_formats[0] if self.supported_output_formats else ''
+        with tempfile.TemporaryDirectory(prefix='convert_stream_') as temp_dir:
+            input_path = os.path.join(temp_dir, 'input' + input_ext)
+            output_path = os.path.join(temp_dir, 'output' + output_ext)
+            with open(input_path, 'wb') as f:
+                shutil.copyfileobj(source, f)
+            if not self.convert(input_path, output_path):
+                return False
+            with open(output_path, 'rb') as f:
+                shutil.copyfileobj(f, sink)
+        return True
@@ -1,39 +1,26 @@
 import os
 import platform
 import logging
-import shutil
+import subprocess
+import tempfile
 
 logger = logging.getLogger(__name__)
 
-def find_soffice():
-    """查找 LibreOffice 可执行文件的路径"""
-    if platform.system() == "Windows":
-        # Windows 下可能的安装路径
-        possible_paths = [
-            r"C:\Program Files\LibreOffice\program\soffice.exe",
-            r"C:\Program Files (x86)\LibreOffice\program\soffice.exe",
-            r"C:\Program Files (x86)\OpenOffice\program\soffice.exe",
-            r"C:\Program Files\OpenOffice\program\soffice.exe",
-        ]
-        for path in possible_paths:
-            if os.path.exists(path):
-                return path
-    else:
-        # Linux/Unix 系统
-        possible_commands = ['soffice', 'libreoffice']
-        for cmd in possible_commands:
-            path = shutil.which(cmd)
-            if path:
-                return path
-    return None
-
 # 根据操作系统动态导入依赖
 try:
     from docx import Document
+    from .docx_markdown import DocxMarkdownWriter, UnsupportedDocxError, find_unsupported, image_data_uri
+    from .docx_writer import UnsupportedMarkdownError, find_advanced, get_template, write_docx
 except ImportError:
     logger.warning("python-docx not installed. Word conversion features will be limited.")
     Document = None
 
+    class UnsupportedDocxError(Exception):
+        pass
+
+    class UnsupportedMarkdownError(Exception):
+        pass
+
 if platform.system() == "Windows":
     try:
         from docx2pdf import convert as docx2pdf_convert
@@ -50,24 +37,38 @@ except ImportError:
     logger.warning("pypandoc not installed. Some conversion features will be limited.")
     pypandoc = None
 
+from config import Config
 from .base import BaseConverter
+from .sniff import sniff
+from .soffice import get_office_pool, run_soffice
+from toolchain import get_toolchains
+from metrics import subprocess_timer
+from .pipeline import ConverterPipeline
+from . import markdown_pdf
 from .xmind_converter import XmindToMarkdownConverter  # 添加这行导入
 
 class DocxToPDFConverter(BaseConverter):
+    toolchain = 'soffice'
+
     def __init__(self):
         super().__init__()
         self.supported_input_formats = ['.docx', '.doc']
         self.supported_output_formats = ['.pdf']
-        self.soffice_path = find_soffice()
     
     def convert(self, input_path: str, output_path: str) -> bool:
         try:
             if platform.system() == "Windows" and docx2pdf_convert:
                 # Windows 优先使用 docx2pdf
-                docx2pdf_convert(input_path, output_path)
+                with subprocess_timer('word'):
+                    docx2pdf_convert(input_path, output_path)
+            elif get_office_pool() is not None:
+                # 优先使用常驻 LibreOffice 进程池，省去每次启动进程的开销
+                get_office_pool().convert(input_path, output_path, 'writer_pdf_Export')
+                logger.info(f"成功转换为PDF: {output_path}")
             else:
                 # 使用 LibreOffice 进行转换
-                if not self.soffice_path:
+                soffice_path = get_toolchains().path('soffice')
+                if not soffice_path:
                     raise Exception(
                         "找不到 LibreOffice。请安装 LibreOffice:\n"
                         "- Windows: 从 https://www.libreoffice.org 下载安装\n"
@@ -75,142 +76,244 @@ class DocxToPDFConverter(BaseConverter):
                         "- Linux (CentOS): sudo yum install libreoffice"
                     )
                 
-                import subprocess
-                input_path = os.path.abspath(input_path)
-                output_dir = os.path.abspath(os.path.dirname(output_path))
-                
-                cmd = [
-                    self.soffice_path,
-                    '--headless',
-                    '--convert-to', 'pdf',
-                    '--outdir', output_dir,
-                    input_path
-                ]
-                
-                logger.info(f"执行命令: {' '.join(cmd)}")
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    check=False  # 不自动抛出异常
-                )
-                
-                if result.returncode != 0:
-                    error_msg = f"LibreOffice转换失败:\n命令: {' '.join(cmd)}\n错误: {result.stderr}"
-                    logger.error(error_msg)
-                    raise Exception(error_msg)
-                
-                # 重命名输出文件
-                temp_pdf = os.path.splitext(os.path.basename(input_path))[0] + '.pdf'
-                temp_pdf_path = os.path.join(output_dir, temp_pdf)
-                
-                if not os.path.exists(temp_pdf_path):
-                    raise Exception(f"PDF文件未生成: {temp_pdf_path}")
-                    
-                os.rename(temp_pdf_path, output_path)
+                run_soffice(input_path, output_path, soffice_path)
                 logger.info(f"成功转换为PDF: {output_path}")
             
             return True
             
         except Exception as e:
             logger.error(f"转换失败: {str(e)}")
+            self.record_error(e)
             return False
 
-def check_pandoc():
-    """检查pandoc是否已安装"""
-    try:
-        import subprocess
-        result = subprocess.run(['pandoc', '--version'], capture_output=True, text=True)
-        return result.returncode == 0
-    except:
-        return False
-
 class DocxToMarkdownConverter(BaseConverter):
+    """优先使用 python-docx 原生转换，遇到不支持的结构时改用 pandoc"""
+    version = '3'
+    # None 表示使用 Config.DOCX_TO_MD_ENGINE
+    engine = None
+
+    # 写出 Markdown 时使用的缓冲区大小
+    WRITE_BUFFER_SIZE = 1024 * 1024
+
     def __init__(self):
         super().__init__()
-        self.supported_input_formats = ['.docx', '.doc']
+        # python-docx 和 pandoc 都只能读取 docx，旧版 .doc 只能通过 LibreOffice 转 PDF
+        self.supported_input_formats = ['.docx']
         self.supported_output_formats = ['.md']
-    
+
+    def get_options(self) -> dict:
+        return {'engine': self.engine or Config().DOCX_TO_MD_ENGINE}
+
     def convert(self, input_path: str, output_path: str) -> bool:
         try:
-            if not check_pandoc():
-                raise Exception(
-                    "未找到pandoc，请安装pandoc：\n"
-                    "Ubuntu: sudo apt-get install pandoc\n"
-                    "CentOS: sudo yum install pandoc\n"
-                    "或访问 https://pandoc.org/installing.html"
-                )
-            
-            if pypandoc is None:
-                raise Exception("pypandoc未正确安装，请重新安装：pip install pypandoc")
-                
-            # 使用绝对路径
-            input_path = os.path.abspath(input_path)
-            output_path = os.path.abspath(output_path)
-            
-            pypandoc.convert_file(input_path, 'markdown', outputfile=output_path)
-            
-            if not os.path.exists(output_path):
-                raise Exception("转换后的文件未生成")
-                
+            engine = self.get_options()['engine']
+            if engine != 'pandoc' and Document is not None and sniff(input_path).ext == '.docx':
+                try:
+                    self._convert_native(input_path, output_path, strict=engine == 'auto')
+                    return True
+                except UnsupportedDocxError as e:
+                    logger.info(f"文档包含{e}，改用 pandoc 转换: {input_path}")
+
+            self._convert_pandoc(input_path, output_path)
             return True
             
         except Exception as e:
             logger.error(f"转换失败: {str(e)}")
+            self.record_error(e)
             return False
 
+    def _convert_native(self, input_path: str, output_path: str, strict: bool):
+        """strict 为 True 且 pandoc 可用时，遇到不支持的结构抛出 UnsupportedDocxError"""
+        document = Document(input_path)
+        unsupported = find_unsupported(document)
+        if unsupported:
+            if strict and get_toolchains().available('pandoc') and pypandoc is not None:
+                raise UnsupportedDocxError(unsupported)
+            logger.warning(f"文档包含{unsupported}，原生转换会丢失这部分内容: {input_path}")
+
+        writer = DocxMarkdownWriter(document)
+        with open(output_path, 'w', encoding='utf-8', buffering=self.WRITE_BUFFER_SIZE) as f:
+            f.writelines(writer.iter_markdown())
+
+    def _convert_pandoc(self, input_path: str, output_path: str):
+        if not get_toolchains().available('pandoc'):
+            raise Exception(
+                "未找到pandoc，请安装pandoc：\n"
+                "Ubuntu: sudo apt-get install pandoc\n"
+                "CentOS: sudo yum install pandoc\n"
+                "或访问 https://pandoc.org/installing.html"
+            )
+        
+        if pypandoc is None:
+            raise Exception("pypandoc未正确安装，请重新安装：pip install pypandoc")
+            
+        # 使用绝对路径
+        input_path = os.path.abspath(input_path)
+        output_path = os.path.abspath(output_path)
+
+        # 图片先导出到临时目录，再以 data URI 内嵌，输出只有一个 Markdown 文件
+        with tempfile.TemporaryDirectory(prefix='docx_media_') as media_dir:
+            with subprocess_timer('pandoc'):
+                # 显式指定输入格式，扩展名写成 .doc 的 docx 也能转换
+                pypandoc.convert_file(
+                    input_path, 'markdown', format='docx', outputfile=output_path,
+                    extra_args=[f'--extract-media={media_dir}']
+                )
+
+            if not os.path.exists(output_path):
+                raise Exception("转换后的文件未生成")
+            self._embed_media(output_path, media_dir)
+
+    @staticmethod
+    def _embed_media(output_path: str, media_dir: str):
+        """把 Markdown 中指向 media_dir 的图片路径替换为 data URI"""
+        images = {}
+        for dir_path, _, file_names in os.walk(media_dir):
+            for file_name in file_names:
+                path = os.path.join(dir_path, file_name)
+                with open(path, 'rb') as f:
+                    images[path] = image_data_uri(f.read(), file_name)
+        if not images:
+            return
+        with open(output_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        # 先替换较长的路径，避免 image1.png 匹配到 image10.png 的前缀
+        for path in sorted(images, key=len, reverse=True):
+            text = text.replace(path, images[path])
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
 class MarkdownToDocxConverter(BaseConverter):
+    """优先直接生成 DOCX，包含代码块、图片、脚注等结构时改用 pandoc"""
+    version = '2'
+    supports_stream = True
+    # None 表示使用 Config.MD_TO_DOCX_ENGINE
+    engine = None
+
     def __init__(self):
         super().__init__()
         self.supported_input_formats = ['.md']
         self.supported_output_formats = ['.docx']
+
+    def get_options(self) -> dict:
+        config = Config()
+        return {'engine': self.engine or config.MD_TO_DOCX_ENGINE, 'template': config.MD_TO_DOCX_TEMPLATE}
+
+    def _convert_native(self, text: str, target) -> bool:
+        """直接生成 DOCX，返回 False 表示应使用 pandoc
+
+        engine 为 auto 且 pandoc 可用时，遇到需要 pandoc 的结构抛出 UnsupportedMarkdownError，
+        在写入 target 之前就会抛出。
+        """
+        engine = self.get_options()['engine']
+        if engine == 'pandoc' or Document is None:
+            return False
+        advanced = find_advanced(text)
+        if advanced is not None:
+            if engine == 'auto' and get_toolchains().available('pandoc'):
+                raise UnsupportedMarkdownError(advanced)
+            logger.warning(f"Markdown 包含{advanced}，原生转换会按普通文本处理")
+        write_docx(text, target, get_template(Config().MD_TO_DOCX_TEMPLATE))
+        return True
+
+    def _try_native(self, text: str, target) -> bool:
+        try:
+            return self._convert_native(text, target)
+        except UnsupportedMarkdownError as e:
+            logger.info(f"Markdown 包含{e}，改用 pandoc 转换")
+            return False
     
     def convert(self, input_path: str, output_path: str) -> bool:
         try:
-            pypandoc.convert_file(input_path, 'docx', outputfile=output_path)
+            with open(input_path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            if self._try_native(text, output_path):
+                return True
+            with subprocess_timer('pandoc'):
+                pypandoc.convert_file(input_path, 'docx', outputfile=output_path)
             return True
         except Exception as e:
             print(f"转换失败: {str(e)}")
+            self.record_error(e)
             return False
 
-class MarkdownToPDFConverter(BaseConverter):
-    def __init__(self):
-        super().__init__()
-        self.supported_input_formats = ['.md']
-        self.supported_output_formats = ['.pdf']
-    
-    def convert(self, input_path: str, output_path: str) -> bool:
+    def convert_stream(self, source, sink, input_format: str = None) -> bool:
         try:
-            pypandoc.convert_file(input_path, 'pdf', outputfile=output_path)
+            data = source.read()
+            text = data.decode('utf-8')
+            if self._try_native(text, sink):
+                return True
+
+            pandoc = get_toolchains().path('pandoc')
+            if not pandoc:
+                raise Exception("未找到pandoc，请安装pandoc：https://pandoc.org/installing.html")
+            # pandoc 通过标准输入输出交换数据，-o - 可以输出二进制的 docx
+            with subprocess_timer('pandoc'):
+                result = subprocess.run(
+                    [pandoc, '-f', 'markdown', '-t', 'docx', '-o', '-'],
+                    input=data,
+                    capture_output=True,
+                    check=False
+                )
+            if result.returncode != 0:
+                raise Exception(result.stderr.decode('utf-8', errors='replace'))
+            sink.write(result.stdout)
             return True
         except Exception as e:
             print(f"转换失败: {str(e)}")
+            self.record_error(e)
             return False
 
-class XmindToDocxConverter(BaseConverter):
+class MarkdownToPDFConverter(BaseConverter):
+    """html 引擎在进程内渲染（需要 WeasyPrint），latex 引擎经 pandoc 调用 LaTeX"""
+    version = '2'
+    # None 表示使用 Config.MD_TO_PDF_ENGINE，可通过 with_options(engine=...) 按请求指定
+    engine = None
+
     def __init__(self):
         super().__init__()
-        self.supported_input_formats = ['.xmind']
-        self.supported_output_formats = ['.docx']
+        self.supported_input_formats = ['.md']
+        self.supported_output_formats = ['.pdf']
+
+    def get_options(self) -> dict:
+        return {'engine': self.engine or Config().MD_TO_PDF_ENGINE}
+
+    def _resolve_engine(self) -> str:
+        engine = self.get_options()['engine']
+        if engine == 'auto':
+            return 'html' if markdown_pdf.available() else 'latex'
+        return engine
+
+    @property
+    def toolchain(self):
+        # 只有 latex 引擎依赖外部工具
+        return 'latex' if self._resolve_engine() == 'latex' else None
     
     def convert(self, input_path: str, output_path: str) -> bool:
         try:
-            # 首先转换为markdown
-            temp_md_path = output_path.replace('.docx', '_temp.md')
-            xmind_converter = XmindToMarkdownConverter()
-            if not xmind_converter.convert(input_path, temp_md_path):
-                return False
-                
-            # 然后将markdown转换为docx
-            md_converter = MarkdownToDocxConverter()
-            result = md_converter.convert(temp_md_path, output_path)
-            
-            # 删除临时文件
-            if os.path.exists(temp_md_path):
-                os.remove(temp_md_path)
-                
-            return result
-            
+            engine = self._resolve_engine()
+            if engine == 'html':
+                if not markdown_pdf.available():
+                    raise Exception("html 引擎需要安装 markdown 和 weasyprint：pip install markdown weasyprint")
+                markdown_pdf.markdown_to_pdf(input_path, output_path)
+                return True
+
+            latex = get_toolchains().path('latex')
+            if not latex:
+                raise Exception("未找到 LaTeX 引擎，请安装 TeX Live 或 MiKTeX")
+            with subprocess_timer('pandoc'):
+                pypandoc.convert_file(
+                    input_path, 'pdf', outputfile=output_path,
+                    extra_args=[f'--pdf-engine={latex}']
+                )
+            return True
         except Exception as e:
             print(f"转换失败: {str(e)}")
+            self.record_error(e)
             return False
+
+class XmindToDocxConverter(ConverterPipeline):
+    """XMind -> Markdown -> Word，中间的 Markdown 只保存在内存中"""
+
+    def __init__(self):
+        super().__init__([XmindToMarkdownConverter(), MarkdownToDocxConverter()])
@@ -0,0 +1,268 @@
+"""基于 python-docx 的 DOCX -> Markdown 转换
+
+支持标题、段落、列表、表格、粗体/斜体、超链接和图片。遇到 Markdown
+无法表达或本模块未实现的结构（脚注、公式、文本框、嵌套表格、合并单元格）
+时抛出 UnsupportedDocxError，由调用方改用 pandoc。
+"""
+import re
+import base64
+import mimetypes
+
+from docx.oxml.ns import qn
+
+# 无法原生转换的结构：标签 -> 说明
+UNSUPPORTED_TAGS = {
+    qn('w:footnoteReference'): '脚注',
+    qn('w:endnoteReference'): '尾注',
+    '{http://schemas.openxmlformats.org/officeDocument/2006/math}oMath': '公式',
+    qn('w:txbxContent'): '文本框',
+    qn('w:gridSpan'): '合并单元格',
+    qn('w:vMerge'): '合并单元格',
+}
+
+_W_P = qn('w:p')
+_W_TBL = qn('w:tbl')
+_W_TC = qn('w:tc')
+_W_SDT = qn('w:sdt')
+_W_R = qn('w:r')
+_W_T = qn('w:t')
+_W_TAB = qn('w:tab')
+_W_BR = qn('w:br')
+_W_HYPERLINK = qn('w:hyperlink')
+_W_DRAWING = qn('w:drawing')
+_A_BLIP = qn('a:blip')
+
+_HEADING_STYLE = re.compile(r'^(?:heading|标题)\s*(\d)$', re.IGNORECASE)
+_LIST_STYLE = re.compile(r'^list (bullet|number)(?:\s*(\d))?$', re.IGNORECASE)
+_INLINE_ESCAPE = re.compile(r'([\\`*_\[\]<>|])')
+_LINE_START_ESCAPE = re.compile(r'^(#|>|[-+]\s|\d+[.)]\s)')
+
+
+class UnsupportedDocxError(Exception):
+    """文档包含原生引擎不支持的结构"""
+
+
+def find_unsupported(document) -> str:
+    """返回文档中第一个不支持的结构的说明，全部支持时返回 None"""
+    body = document.element.body
+    for element in body.iter(*UNSUPPORTED_TAGS):
+        return UNSUPPORTED_TAGS[element.tag]
+    for table in body.iter(_W_TBL):
+        if any(ancestor.tag == _W_TC for ancestor in table.iterancestors()):
+            return '嵌套表格'
+    return None
+
+
+def _escape(text: str) -> str:
+    return _INLINE_ESCAPE.sub(r'\\\1', text)
+
+
+def image_data_uri(data: bytes, name: str) -> str:
+    """图片内容转换为 data URI，MIME 类型按文件名推断"""
+    mime = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    return f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+class DocxMarkdownWriter:
+    """把一个 python-docx 文档逐块转换为 Markdown
+
+    图片以 data URI 内嵌，输出的 Markdown 是单个自包含的文件。
+    """
+
+    def __init__(self, document):
+        self.document = document
+        self.part = document.part
+        self._images = {}
+        self._styles = {}
+        self._list_formats = self._load_list_formats()
+
+    def _load_list_formats(self) -> dict:
+        """读取编号定义：(numId, 级别) -> 是否为有序列表"""
+        try:
+            numbering = self.part.numbering_part.element
+        except (KeyError, NotImplementedError):
+            return {}
+        abstract_formats = {}
+        for abstract in numbering.iter(qn('w:abstractNum')):
+            levels = {}
+            for level in abstract.iter(qn('w:lvl')):
+                num_fmt = level.find(qn('w:numFmt'))
+                fmt = num_fmt.get(qn('w:val')) if num_fmt is not None else 'bullet'
+                levels[int(level.get(qn('w:ilvl'), 0))] = fmt not in ('bullet', 'none')
+            abstract_formats[abstract.get(qn('w:abstractNumId'))] = levels
+
+        formats = {}
+        for num in numbering.iter(qn('w:num')):
+            abstract_id = num.find(qn('w:abstractNumId'))
+            if abstract_id is None:
+                continue
+            levels = abstract_formats.get(abstract_id.get(qn('w:val')), {})
+            for level, ordered in levels.items():
+                formats[(num.get(qn('w:numId')), level)] = ordered
+        return formats
+
+    def _style_name(self, style_id: str) -> str:
+        if style_id not in self._styles:
+            name = ''
+            for style in self.document.styles.element.iter(qn('w:style')):
+                if style.get(qn('w:styleId')) == style_id:
+                    name_element = style.find(qn('w:name'))
+                    name = name_element.get(qn('w:val')) if name_element is not None else ''
+                    break
+            self._styles[style_id] = name
+        return self._styles[style_id]
+
+    def iter_blocks(self, container=None):
+        """按文档顺序生成 (类型, Markdown 文本)，类型为 'list' 或 'block'"""
+        if container is None:
+            container = self.document.element.body
+        for child in container.iterchildren():
+            if child.tag == _W_P:
+                block = self._paragraph(child)
+                if block is not None:
+                    yield block
+            elif child.tag == _W_TBL:
+                yield 'block', self._table(child)
+            elif child.tag == _W_SDT:
+                # 内容控件（例如目录）中的段落按普通段落处理
+                content = child.find(qn('w:sdtContent'))
+                if content is not None:
+                    yield from self.iter_blocks(content)
+
+    def iter_markdown(self):
+        """生成 Markdown 文本片段，连续的列表项之间不空行"""
+        previous = None
+        for kind, text in self.iter_blocks():
+            if previous is not None:
+                yield '\n' if kind == previous == 'list' else '\n\n'
+            yield text
+            previous = kind
+        if previous is not None:
+            yield '\n'
+
+    def _paragraph(self, p):
+        text = self._inline(p).strip()
+        ppr = p.pPr
+        style_id = ppr.pStyle.val if ppr is not None and ppr.pStyle is not None else None
+        style_name = self._style_name(style_id) if style_id else ''
+
+        match = _HEADING_STYLE.match(style_name)
+        if match or style_name.lower() == 'title':
+            if not text:
+                return None
+            level = int(match.group(1)) if match else 1
+            return 'block', '#' * min(max(level, 1), 6) + ' ' + text
+
+        # List Bullet 2 / List Number 3 等样式名中的数字表示嵌套层级
+        match = _LIST_STYLE.match(style_name)
+        style_level = int(match.group(2) or 1) - 1 if match else 0
+        num_pr = ppr.numPr if ppr is not None else None
+        if num_pr is not None and num_pr.numId is not None:
+            ilvl = num_pr.ilvl.val if num_pr.ilvl is not None else 0
+            ordered = self._list_formats.get((str(num_pr.numId.val), ilvl), False)
+            # 每级样式各自关联编号定义时 ilvl 都是 0（例如 Word 默认模板和 docx_writer），层级以样式名为准
+            level = ilvl or style_level
+            return 'list', '    ' * level + ('1. ' if ordered else '- ') + text
+        if match:
+            return 'list', '    ' * style_level + ('1. ' if match.group(1).lower() == 'number' else '- ') + text
+
+        if not text:
+            return None
+        return 'block', _LINE_START_ESCAPE.sub(r'\\\1', text)
+
+    def _inline(self, element) -> str:
+        """转换段落内的文字，相邻且格式相同的文字合并后再加粗体/斜体标记"""
+        pieces = []
+        spans = []
+
+        def flush():
+            if spans:
+                pieces.append(self._format_spans(spans))
+                spans.clear()
+
+        for child in element.iterchildren():
+            if child.tag == _W_R:
+                self._run(child, spans, pieces, flush)
+            elif child.tag == _W_HYPERLINK:
+                flush()
+                link_spans = []
+                for run in child.iter(_W_R):
+                    self._run(run, link_spans, pieces, flush)
+                label = self._format_spans(link_spans)
+                rel_id = child.get(qn('r:id'))
+                url = self.part.rels[rel_id].target_ref if rel_id in self.part.rels else None
+                pieces.append(f"[{label}]({url})" if url else label)
+            else:
+                # 修订、智能标记、域等容器中的文字
+                for run in child.iter(_W_R):
+                    self._run(run, spans, pieces, flush)
+        flush()
+        return ''.join(pieces)
+
+    def _run(self, r, spans, pieces, flush):
+        rpr = r.rPr
+        bold = rpr is not None and rpr.b is not None and rpr.b.val is not False
+        italic = rpr is not None and rpr.i is not None and rpr.i.val is not False
+        for child in r.iterchildren():
+            if child.tag == _W_T:
+                text = _escape(child.text or '')
+            elif child.tag == _W_TAB:
+                text = '\t'
+            elif child.tag == _W_BR:
+                if child.get(qn('w:type')) == 'page':
+                    continue
+                text = '  \n'
+            elif child.tag == _W_DRAWING:
+                flush()
+                pieces.extend(self._image(blip) for blip in child.iter(_A_BLIP))
+                continue
+            else:
+                continue
+            if spans and spans[-1][1:] == (bold, italic):
+                spans[-1][0] += text
+            else:
+                spans.append([text, bold, italic])
+
+    @staticmethod
+    def _format_spans(spans) -> str:
+        result = []
+        for text, bold, italic in spans:
+            stripped = text.strip()
+            if not stripped or not (bold or italic):
+                result.append(text)
+                continue
+            marker = ('**' if bold else '') + ('*' if italic else '')
+            # 标记必须紧贴文字，首尾空白移到标记外
+            leading = text[:len(text) - len(text.lstrip())]
+            trailing = text[len(text.rstrip()):]
+            result.append(f"{leading}{marker}{stripped}{marker[::-1]}{trailing}")
+        return ''.join(result)
+
+    def _image(self, blip) -> str:
+        rel_id = blip.get(qn('r:embed'))
+        if rel_id not in self._images:
+            image_part = self.part.related_parts.get(rel_id)
+            if image_part is None:
+                return ''
+            self._images[rel_id] = image_data_uri(image_part.blob, image_part.partname)
+        return f"![]({self._images[rel_id]})"
+
+    def _table(self, tbl) -> str:
+        rows = []
+        for tr in tbl.iter(qn('w:tr')):
+            cells = []
+            for tc in tr.iter(_W_TC):
+                paragraphs = [self._inline(p).strip() for p in tc.iter(_W_P)]
+                cells.append('<br>'.join(p for p in paragraphs if p).replace('\n', ' '))
+            rows.append(cells)
+        if not rows:
+            return ''
+
+        width = max(len(row) for row in rows)
+        lines = []
+        for index, row in enumerate(rows):
+            row = row + [''] * (width - len(row))
+            lines.append('| ' + ' | '.join(row) + ' |')
+            if index == 0:
+                lines.append('|' + ' --- |' * width)
+        return '\n'.join(lines)
@@ -0,0 +1,372 @@
+"""Markdown -> DOCX，直接生成 document.xml
+
+模板（样式、编号定义、页面设置）只用 python-docx 加载一次，之后每个文档
+复制模板的各个部件，只重新生成 document.xml，以及有序列表和超链接需要的
+numbering.xml、document.xml.rels。
+
+支持标题、段落、有序/无序列表（三级）、表格、粗体、斜体、行内代码和链接。
+代码块、图片、引用、脚注、公式、HTML 等结构由 find_advanced 检出，交给 pandoc。
+"""
+import io
+import os
+import re
+import zipfile
+import threading
+from xml.sax.saxutils import escape, quoteattr
+
+from docx import Document
+
+DOCUMENT_PART = 'word/document.xml'
+NUMBERING_PART = 'word/numbering.xml'
+RELS_PART = 'word/_rels/document.xml.rels'
+# 每个文档重新生成的部件
+DYNAMIC_PARTS = {DOCUMENT_PART, NUMBERING_PART, RELS_PART}
+HYPERLINK_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink'
+
+# 列表最多三级，对应模板中的 List Bullet / List Bullet 2 / List Bullet 3
+MAX_LIST_LEVEL = 3
+
+_ADVANCED_PATTERNS = [
+    (re.compile(r'^\s*(```|~~~)'), '代码块'),
+    (re.compile(r'!\['), '图片'),
+    (re.compile(r'\[\^[^\]]+\]'), '脚注'),
+    (re.compile(r'\$\$|\\\(|\\\['), '公式'),
+    (re.compile(r'<[A-Za-z!/][^>]*>'), 'HTML'),
+    (re.compile(r'^\s{0,3}>'), '引用'),
+    (re.compile(r'^\s{0,3}\[[^\]]+\]:\s'), '引用式链接'),
+    (re.compile(r'^\s{0,3}([-*_])(\s*\1){2,}\s*$'), '分隔线'),
+    (re.compile(r'^\s{0,3}=+\s*$'), 'Setext 标题'),
+]
+
+_HEADING = re.compile(r'^\s{0,3}(#{1,6})\s+(.*?)\s*#*\s*$')
+_LIST_ITEM = re.compile(r'^(\s*)([-*+]|\d{1,9}[.)])\s+(.*)$')
+_TABLE_SEPARATOR = re.compile(r'^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$')
+_TABLE_CELL_SPLIT = re.compile(r'(?<!\\)\|')
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_INLINE = re.compile(r'''
+    (?P<code_mark>`+)(?P<code>.+?)(?P=code_mark)
+  | \*\*(?P<bold>.+?)\*\*
+  | (?<![A-Za-z0-9])__(?P<bold2>.+?)__(?![A-Za-z0-9])
+  | \*(?P<italic>[^*\s](?:.*?[^*\s])?)\*
+  | (?<![A-Za-z0-9])_(?P<italic2>[^_\s](?:.*?[^_\s])?)_(?![A-Za-z0-9])
+  | \[(?P<link_text>[^\]]+)\]\((?P<link_url>[^)\s]+)(?:\s+"[^"]*")?\)
+  | \\(?P<escaped>[\\`*_{}\[\]()#+\-.!|>])
+''', re.VERBOSE)
+
+
+class UnsupportedMarkdownError(Exception):
+    """Markdown 包含原生写入器不支持的结构"""
+
+
+def find_advanced(text: str) -> str:
+    """返回第一个需要 pandoc 处理的结构的说明，没有时返回 None"""
+    for line in text.splitlines():
+        for pattern, name in _ADVANCED_PATTERNS:
+            if pattern.search(line):
+                return name
+    return None
+
+
+def _clean(text: str) -> str:
+    return escape(_INVALID_XML_CHARS.sub('', text))
+
+
+class DocxTemplate:
+    """加载一次的模板：各部件的原始字节和常用样式的 ID"""
+
+    def __init__(self, path: str = None):
+        document = Document(path)
+        self.style_ids = {}
+        self.list_nums = {}
+        styles = {style.name: style for style in document.styles}
+        for name in ['Table Grid'] + [f'Heading {i}' for i in range(1, 7)]:
+            if name in styles:
+                self.style_ids[name] = styles[name].style_id
+        for kind, base in (('bullet', 'List Bullet'), ('number', 'List Number')):
+            for level in range(MAX_LIST_LEVEL):
+                name = base if level == 0 else f'{base} {level + 1}'
+                if name not in styles:
+                    continue
+                style = styles[name]
+                self.style_ids[(kind, level)] = style.style_id
+                ppr = style.element.pPr
+                if ppr is not None and ppr.numPr is not None and ppr.numPr.numId is not None:
+                    self.list_nums[(kind, level)] = str(ppr.numPr.numId.val)
+
+        buffer = io.BytesIO()
+        document.save(buffer)
+        with zipfile.ZipFile(buffer) as zf:
+            parts = {name: zf.read(name) for name in zf.namelist()}
+
+        # 不随文档变化的部件（样式表有数百 KB）只压缩一次，生成文档时复制后追加其余部件
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for name, data in parts.items():
+                if name not in DYNAMIC_PARTS:
+                    zf.writestr(name, data)
+        self.base_archive = archive.getvalue()
+        self.numbering = parts.get(NUMBERING_PART, b'').decode('utf-8')
+        self.rels = parts[RELS_PART].decode('utf-8')
+
+        xml = parts[DOCUMENT_PART].decode('utf-8')
+        body_start = xml.index('>', xml.index('<w:body')) + 1
+        section = xml.rfind('<w:sectPr')
+        body_end = section if section >= 0 else xml.rindex('</w:body>')
+        self.document_prefix = xml[:body_start]
+        self.document_suffix = xml[body_end:]
+
+        # 有序列表每次重新从 1 开始编号，需要为每个列表新建 w:num
+        self.abstract_ids = {}
+        self.next_num_id = 1
+        for num_id, abstract_id in re.findall(
+                r'<w:num w:numId="(\d+)"[^>]*>\s*<w:abstractNumId w:val="(\d+)"', self.numbering):
+            self.abstract_ids[num_id] = abstract_id
+            self.next_num_id = max(self.next_num_id, int(num_id) + 1)
+
+
+_template = None
+_template_key = None
+_template_lock = threading.Lock()
+
+
+def get_template(path: str = None) -> DocxTemplate:
+    """返回缓存的模板，模板文件修改后自动重新加载"""
+    global _template, _template_key
+    key = (path, os.path.getmtime(path)) if path else None
+    with _template_lock:
+        if _template is None or _template_key != key:
+            _template = DocxTemplate(path)
+            _template_key = key
+        return _template
+
+
+class _DocumentBuilder:
+    """生成一个文档的 document.xml 正文，并记录新增的编号和超链接"""
+
+    def __init__(self, template: DocxTemplate):
+        self.template = template
+        self.body = []
+        self.numbering = []
+        self.links = []
+        self._next_num_id = template.next_num_id
+        # 当前列表各级的 (类型, numId)
+        self._lists = []
+
+    # 行内格式
+
+    def _runs(self, text: str, bold=False, italic=False, link=False) -> str:
+        result = []
+        position = 0
+        for match in _INLINE.finditer(text):
+            if match.start() > position:
+                result.append(self._run(text[position:match.start()], bold, italic, link=link))
+            position = match.end()
+            if match.group('code') is not None:
+                result.append(self._run(match.group('code'), bold, italic, code=True, link=link))
+            elif match.group('bold') is not None or match.group('bold2') is not None:
+                result.append(self._runs(match.group('bold') or match.group('bold2'), True, italic, link))
+            elif match.group('italic') is not None or match.group('italic2') is not None:
+                result.append(self._runs(match.group('italic') or match.group('italic2'), bold, True, link))
+            elif match.group('link_text') is not None and not link:
+                result.append(self._link(match.group('link_text'), match.group('link_url'), bold, italic))
+            else:
+                result.append(self._run(match.group('escaped') or match.group(0), bold, italic, link=link))
+        if position < len(text):
+            result.append(self._run(text[position:], bold, italic, link=link))
+        return ''.join(result)
+
+    @staticmethod
+    def _run(text: str, bold=False, italic=False, code=False, link=False) -> str:
+        if not text:
+            return ''
+        props = []
+        if code:
+            props.append('<w:rFonts w:ascii="Consolas" w:hAnsi="Consolas"/>')
+        if bold:
+            props.append('<w:b/>')
+        if italic:
+            props.append('<w:i/>')
+        if link:
+            props.append('<w:color w:val="0563C1"/><w:u w:val="single"/>')
+        rpr = f"<w:rPr>{''.join(props)}</w:rPr>" if props else ''
+        lines = text.split('\n')
+        content = '<w:br/>'.join(f'<w:t xml:space="preserve">{_clean(line)}</w:t>' for line in lines)
+        return f"<w:r>{rpr}{content}</w:r>"
+
+    def _link(self, text: str, url: str, bold: bool, italic: bool) -> str:
+        rel_id = f"rIdLink{len(self.links) + 1}"
+        self.links.append((rel_id, url))
+        return f'<w:hyperlink r:id="{rel_id}">{self._runs(text, bold, italic, link=True)}</w:hyperlink>'
+
+    # 块级元素
+
+    def paragraph(self, text: str, style_id: str = None, num_id: str = None):
+        ppr = ''
+        if style_id or num_id:
+            style = f'<w:pStyle w:val="{style_id}"/>' if style_id else ''
+            numbering = f'<w:numPr><w:ilvl w:val="0"/><w:numId w:val="{num_id}"/></w:numPr>' if num_id else ''
+            ppr = f"<w:pPr>{style}{numbering}</w:pPr>"
+        self.body.append(f"<w:p>{ppr}{self._runs(text)}</w:p>")
+
+    def heading(self, level: int, text: str):
+        self._lists = []
+        style_id = self.template.style_ids.get(f'Heading {level}')
+        if style_id is None:
+            self.paragraph(f"**{text}**")
+        else:
+            self.paragraph(text, style_id)
+
+    def text(self, text: str):
+        self._lists = []
+        self.paragraph(text)
+
+    def list_item(self, level: int, ordered: bool, text: str):
+        kind = 'number' if ordered else 'bullet'
+        level = min(level, MAX_LIST_LEVEL - 1)
+        del self._lists[level + 1:]
+        if len(self._lists) <= level or self._lists[level][0] != kind:
+            del self._lists[level:]
+            while len(self._lists) <= level:
+                self._lists.append((kind, self._new_list(kind, len(self._lists))))
+        style_id = self.template.style_ids.get((kind, level))
+        self.paragraph(text, style_id, self._lists[level][1])
+
+    def _new_list(self, kind: str, level: int) -> str:
+        num_id = self.template.list_nums.get((kind, level))
+        abstract_id = self.template.abstract_ids.get(num_id)
+        if kind != 'number' or abstract_id is None:
+            return num_id
+        num_id = str(self._next_num_id)
+        self._next_num_id += 1
+        self.numbering.append(
+            f'<w:num w:numId="{num_id}"><w:abstractNumId w:val="{abstract_id}"/>'
+            f'<w:lvlOverride w:ilvl="0"><w:startOverride w:val="1"/></w:lvlOverride></w:num>'
+        )
+        return num_id
+
+    def table(self, rows):
+        self._lists = []
+        width = max(len(row) for row in rows)
+        style_id = self.template.style_ids.get('Table Grid')
+        if style_id:
+            table_props = f'<w:tblStyle w:val="{style_id}"/>'
+        else:
+            borders = ''.join(
+                f'<w:{side} w:val="single" w:sz="4" w:space="0" w:color="auto"/>'
+                for side in ('top', 'left', 'bottom', 'right', 'insideH', 'insideV')
+            )
+            table_props = f'<w:tblBorders>{borders}</w:tblBorders>'
+        parts = [f'<w:tbl><w:tblPr>{table_props}<w:tblW w:w="0" w:type="auto"/></w:tblPr><w:tblGrid>']
+        parts.append('<w:gridCol/>' * width)
+        parts.append('</w:tblGrid>')
+        for index, row in enumerate(rows):
+            parts.append('<w:tr>')
+            for cell in row + [''] * (width - len(row)):
+                runs = self._runs(cell, bold=index == 0)
+                parts.append(f'<w:tc><w:tcPr><w:tcW w:w="0" w:type="auto"/></w:tcPr><w:p>{runs}</w:p></w:tc>')
+            parts.append('</w:tr>')
+        parts.append('</w:tbl>')
+        self.body.append(''.join(parts))
+        # 相邻表格之间需要段落分隔，否则 Word 会合并
+        self.body.append('<w:p/>')
+
+
+def _split_row(line: str):
+    line = line.strip()
+    if line.startswith('|'):
+        line = line[1:]
+    if line.endswith('|') and not line.endswith('\\|'):
+        line = line[:-1]
+    return [cell.strip().replace('\\|', '|') for cell in _TABLE_CELL_SPLIT.split(line)]
+
+
+def build_document(text: str, template: DocxTemplate) -> _DocumentBuilder:
+    builder = _DocumentBuilder(template)
+    lines = text.splitlines()
+    paragraph = []
+    indents = []
+
+    def flush():
+        if paragraph:
+            # 以两个空格结尾的行是硬换行
+            parts = []
+            for line in paragraph[:-1]:
+                parts.append(line.strip() + ('\n' if line.endswith('  ') else ' '))
+            parts.append(paragraph[-1].strip())
+            builder.text(''.join(parts))
+            paragraph.clear()
+
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        index += 1
+        if not line.strip():
+            flush()
+            continue
+
+        heading = _HEADING.match(line)
+        if heading:
+            flush()
+            indents = []
+            builder.heading(len(heading.group(1)), heading.group(2))
+            continue
+
+        if '|' in line and index < len(lines) and _TABLE_SEPARATOR.match(lines[index]) and '-' in lines[index]:
+            flush()
+            indents = []
+            rows = [_split_row(line)]
+            index += 1
+            while index < len(lines) and '|' in lines[index] and lines[index].strip():
+                rows.append(_split_row(lines[index]))
+                index += 1
+            builder.table(rows)
+            continue
+
+        item = _LIST_ITEM.match(line)
+        if item:
+            flush()
+            indent = len(item.group(1).expandtabs(4))
+            while indents and indents[-1] > indent:
+                indents.pop()
+            if not indents or indents[-1] < indent:
+                indents.append(indent)
+            builder.list_item(len(indents) - 1, item.group(2)[0].isdigit(), item.group(3).strip())
+            continue
+
+        paragraph.append(line)
+    flush()
+    return builder
+
+
+def write_docx(text: str, target, template: DocxTemplate):
+    """把 Markdown 文本写为 DOCX，target 为文件路径或可写的二进制对象"""
+    builder = build_document(text, template)
+    document = ''.join([template.document_prefix] + builder.body + [template.document_suffix])
+
+    numbering = template.numbering
+    if builder.numbering:
+        end = numbering.rindex('</w:numbering>')
+        numbering = numbering[:end] + ''.join(builder.numbering) + numbering[end:]
+
+    rels = template.rels
+    if builder.links:
+        end = rels.rindex('</Relationships>')
+        rels = rels[:end] + ''.join(
+            f'<Relationship Id="{rel_id}" Type="{HYPERLINK_TYPE}" '
+            f'Target={quoteattr(url)} TargetMode="External"/>'
+            for rel_id, url in builder.links
+        ) + rels[end:]
+
+    buffer = io.BytesIO(template.base_archive)
+    with zipfile.ZipFile(buffer, 'a', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(DOCUMENT_PART, document)
+        zf.writestr(RELS_PART, rels)
+        if numbering:
+            zf.writestr(NUMBERING_PART, numbering)
+
+    if isinstance(target, str):
+        with open(target, 'wb') as f:
+            f.write(buffer.getbuffer())
+    else:
+        target.write(buffer.getbuffer())
@@ -1,10 +1,24 @@
+from config import Config
 from .base import BaseConverter
+from .soffice import get_office_pool, run_soffice
+from .workbook_probe import probe_sheet_names
+from .sniff import sniff
 import pandas as pd
 import os
+import io
+import csv
 import zipfile
 from typing import List
 
+try:
+    from openpyxl import Workbook, load_workbook
+except ImportError:
+    Workbook = None
+    load_workbook = None
+
 class ExcelToCSVConverter(BaseConverter):
+    version = '2'
+
     def __init__(self):
         super().__init__()
         self.supported_input_formats = ['.xlsx', '.xls']
@@ -20,79 +34,155 @@ class ExcelToCSVConverter(BaseConverter):
             output_dir = os.path.dirname(output_path)
             os.makedirs(output_dir, exist_ok=True)
             
-            # 读取Excel文件的所有表格
-            excel_file = pd.ExcelFile(input_path)
-            sheet_names = excel_file.sheet_names
+            # 只读取工作表索引，与 Web 端判断输出类型共用缓存
+            sheet_names = probe_sheet_names(input_path)
             
-            # 如果只有一个表格，直接转换为CSV
-            if len(sheet_names) == 1:
-                df = pd.read_excel(input_path)
-                df.to_csv(output_path, index=False, encoding='utf-8')
-                return True
-                
-            # 如果有多个表格，创建临时目录存放CSV文件
-            temp_dir = os.path.join(output_dir, "temp_csv")
-            os.makedirs(temp_dir, exist_ok=True)
-            
-            csv_files = []
-            try:
-                # 转换每个表格为CSV
-                for sheet in sheet_names:
-                    df = pd.read_excel(input_path, sheet_name=sheet)
-                    safe_sheet_name = "".join(x for x in sheet if x.isalnum() or x in "._- ")
-                    csv_path = os.path.join(temp_dir, f"{safe_sheet_name}.csv")
-                    df.to_csv(csv_path, index=False, encoding='utf-8')
-                    csv_files.append(csv_path)
-                
-                # 创建ZIP文件（替换原始的output_path扩展名）
-                zip_path = os.path.splitext(output_path)[0] + '.zip'
-                with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                    for csv_file in csv_files:
-                        # 将CSV文件添加到ZIP中，使用相对路径
-                        arcname = os.path.basename(csv_file)
-                        zipf.write(csv_file, arcname)
-                
-                # 更新输出路径为zip文件路径
-                if os.path.exists(zip_path):
-                    os.rename(zip_path, output_path)
-                
-                return True
-                
-            finally:
-                # 清理临时文件和目录
-                for csv_file in csv_files:
-                    try:
-                        if os.path.exists(csv_file):
-                            os.remove(csv_file)
-                    except:
-                        pass
-                try:
-                    if os.path.exists(temp_dir):
-                        os.rmdir(temp_dir)
-                except:
-                    pass
+            # xlsx 使用 openpyxl 只读模式流式转换，xls 等其他格式回退到 pandas
+            # 按内容判断，扩展名写错的 xlsx 也走流式转换
+            if load_workbook is not None and sniff(input_path).ext == '.xlsx':
+                self._convert_streaming(input_path, output_path, sheet_names)
+            else:
+                self._convert_pandas(input_path, output_path, sheet_names)
+            return True
             
         except Exception as e:
             print(f"转换失败: {str(e)}")
+            self.record_error(e)
             return False
 
+    @staticmethod
+    def _csv_names(sheet_names: List[str]) -> List[str]:
+        """生成 ZIP 内不重复的 CSV 文件名"""
+        names = []
+        used = set()
+        for index, sheet in enumerate(sheet_names):
+            safe_sheet_name = "".join(x for x in sheet if x.isalnum() or x in "._- ").strip()
+            name = safe_sheet_name or f"sheet{index + 1}"
+            candidate = name
+            suffix = 1
+            while candidate.lower() in used:
+                suffix += 1
+                candidate = f"{name}_{suffix}"
+            used.add(candidate.lower())
+            names.append(f"{candidate}.csv")
+        return names
+
+    @staticmethod
+    def _write_rows(rows, text_file):
+        """逐行写入 CSV，丢弃表格末尾的空行"""
+        writer = csv.writer(text_file, lineterminator='\n')
+        pending_empty = 0
+        for row in rows:
+            if all(value is None for value in row):
+                pending_empty += 1
+                continue
+            for _ in range(pending_empty):
+                writer.writerow(())
+            pending_empty = 0
+            writer.writerow(['' if value is None else value for value in row])
+
+    def _convert_streaming(self, input_path: str, output_path: str, sheet_names: List[str]):
+        # 只解析一次工作簿，按行迭代，每个表格直接写入对应的 ZIP 条目
+        # 传入文件对象，openpyxl 不再检查扩展名（扩展名写错的 xlsx 也能打开）
+        with open(input_path, 'rb') as source:
+            workbook = load_workbook(source, read_only=True, data_only=True)
+            try:
+                sheets = [workbook[name] for name in sheet_names]
+                if len(sheets) == 1:
+                    with open(output_path, 'w', encoding='utf-8', newline='') as f:
+                        self._write_rows(sheets[0].iter_rows(values_only=True), f)
+                    return
+
+                names = self._csv_names(sheet_names)
+                with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                    for sheet, arcname in zip(sheets, names):
+                        with io.TextIOWrapper(zipf.open(arcname, 'w'), encoding='utf-8', newline='') as f:
+                            self._write_rows(sheet.iter_rows(values_only=True), f)
+            finally:
+                workbook.close()
+
+    def _convert_pandas(self, input_path: str, output_path: str, sheet_names: List[str]):
+        # 复用同一个 ExcelFile，避免每个表格重新解析整个文件
+        with pd.ExcelFile(input_path) as excel_file:
+            # 如果只有一个表格，直接转换为CSV
+            if len(sheet_names) == 1:
+                df = excel_file.parse(sheet_names[0])
+                df.to_csv(output_path, index=False, encoding='utf-8')
+                return
+            
+            # 如果有多个表格，每个表格直接写入ZIP
+            names = self._csv_names(sheet_names)
+            with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                for sheet, arcname in zip(sheet_names, names):
+                    df = excel_file.parse(sheet)
+                    with io.TextIOWrapper(zipf.open(arcname, 'w'), encoding='utf-8', newline='') as f:
+                        df.to_csv(f, index=False)
+                    del df
+
 class CSVToExcelConverter(BaseConverter):
+    version = '2'
+
+    # xlsx 单个工作表的最大行数（含表头）
+    MAX_SHEET_ROWS = 1048576
+    # DataFrame 分块相对 CSV 原始文本的内存放大系数（估算值）
+    MEMORY_FACTOR = 8
+    SAMPLE_BYTES = 1024 * 1024
+
     def __init__(self):
         super().__init__()
         self.supported_input_formats = ['.csv']
         self.supported_output_formats = ['.xlsx']
     
+    def _chunk_rows(self, input_path: str) -> int:
+        """根据内存预算和 CSV 平均行长估算每个分块的行数"""
+        with open(input_path, 'rb') as f:
+            sample = f.read(self.SAMPLE_BYTES)
+        lines = max(sample.count(b'\n'), 1)
+        bytes_per_row = max(len(sample) // lines, 1)
+        budget = Config().CSV_TO_EXCEL_MEMORY_BUDGET
+        return max(budget // (bytes_per_row * self.MEMORY_FACTOR), 100)
+
     def convert(self, input_path: str, output_path: str) -> bool:
         try:
-            df = pd.read_csv(input_path, encoding='utf-8')
-            df.to_excel(output_path, index=False)
+            # 分块读取 CSV 并追加到只写模式的工作簿，内存占用与文件大小无关
+            workbook = Workbook(write_only=True)
+            sheet = None
+            sheet_rows = 0
+            header = None
+
+            reader = pd.read_csv(input_path, encoding='utf-8', chunksize=self._chunk_rows(input_path))
+            with reader:
+                for chunk in reader:
+                    if header is None:
+                        header = [str(column) for column in chunk.columns]
+                    # NaN 写为空单元格
+                    chunk = chunk.astype(object).where(chunk.notna(), None)
+                    for row in chunk.itertuples(index=False, name=None):
+                        # 超出单表行数上限时自动写入新的工作表
+                        if sheet is None or sheet_rows >= self.MAX_SHEET_ROWS:
+                            sheet = workbook.create_sheet(f"Sheet{len(workbook.worksheets) + 1}")
+                            sheet.append(header)
+                            sheet_rows = 1
+                        sheet.append(row)
+                        sheet_rows += 1
+
+            if sheet is None:
+                # 只有表头或空文件时也生成一个工作表
+                sheet = workbook.create_sheet("Sheet1")
+                if header:
+                    sheet.append(header)
+
+            workbook.save(output_path)
             return True
             
         except Exception as e:
             print(f"转换失败: {str(e)}")
+            self.record_error(e)
             return False
 
 class ExcelToPDFConverter(BaseConverter):
+    toolchain = 'soffice'
+
     def __init__(self):
         super().__init__()
         self.supported_input_formats = ['.xlsx', '.xls']
@@ -108,6 +198,7 @@ class ExcelToPDFConverter(BaseConverter):
                 
         except Exception as e:
             print(f"转换失败: {str(e)}")
+            self.record_error(e)
             return False
     
     def _convert_windows(self, input_path: str, output_path: str) -> bool:
@@ -139,42 +230,26 @@ class ExcelToPDFConverter(BaseConverter):
                 
         except Exception as e:
             print(f"Windows转换失败: {str(e)}")
+            self.record_error(e)
             return False
     
     def _convert_linux(self, input_path: str, output_path: str) -> bool:
         try:
-            # 使用LibreOffice进行转换
-            import subprocess
-            
             # 确保输入输出路径是绝对路径
             input_path = os.path.abspath(input_path)
             output_path = os.path.abspath(output_path)
             
-            # 使用soffice命令进行转换
-            cmd = [
-                'soffice',
-                '--headless',
-                '--convert-to', 'pdf',
-                '--outdir', os.path.dirname(output_path),
-                input_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode != 0:
-                print(f"LibreOffice转换失败: {result.stderr}")
-                return False
-                
-            # LibreOffice生成的PDF文件名可能与我们想要的不同，需要重命名
-            generated_pdf = os.path.splitext(os.path.basename(input_path))[0] + '.pdf'
-            generated_pdf_path = os.path.join(os.path.dirname(output_path), generated_pdf)
-            
-            if os.path.exists(generated_pdf_path):
-                os.rename(generated_pdf_path, output_path)
+            # 优先使用常驻 LibreOffice 进程池
+            pool = get_office_pool()
+            if pool is not None:
+                pool.convert(input_path, output_path, 'calc_pdf_Export')
                 return True
             
-            return False
+            # 使用独立配置目录和私有输出目录的一次性 soffice 进程
+            run_soffice(input_path, output_path)
+            return True
             
         except Exception as e:
             print(f"Linux转换失败: {str(e)}")
+            self.record_error(e)
             return False
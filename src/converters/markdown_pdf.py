@@ -0,0 +1,97 @@
+"""Markdown -> HTML -> PDF，不依赖 LaTeX
+
+Markdown 在进程内渲染为 HTML，再由 WeasyPrint 排版为 PDF。样式表和字体
+配置按线程缓存，只有 Config.MD_TO_PDF_CSS 指向的文件变化时才重新加载。
+"""
+import os
+import html
+import threading
+
+from config import Config
+
+try:
+    import markdown
+except ImportError:
+    markdown = None
+
+try:
+    from weasyprint import HTML, CSS
+    try:
+        from weasyprint.text.fonts import FontConfiguration
+    except ImportError:
+        # WeasyPrint 53 之前的版本
+        from weasyprint.fonts import FontConfiguration
+except (ImportError, OSError):
+    # 缺少 Pango 等系统库时导入会抛出 OSError
+    HTML = None
+
+MARKDOWN_EXTENSIONS = ['extra', 'sane_lists']
+
+DEFAULT_CSS = """
+@page { size: A4; margin: 2cm; }
+body {
+    font-family: "Noto Sans CJK SC", "Source Han Sans SC", "Microsoft YaHei", "PingFang SC", sans-serif;
+    font-size: 11pt;
+    line-height: 1.6;
+}
+h1, h2, h3, h4, h5, h6 { line-height: 1.3; page-break-after: avoid; }
+pre, code { font-family: "DejaVu Sans Mono", Consolas, monospace; font-size: 9.5pt; }
+pre { background: #f6f8fa; padding: 8px; white-space: pre-wrap; }
+table { border-collapse: collapse; margin: 8px 0; }
+th, td { border: 1px solid #999; padding: 4px 8px; }
+img { max-width: 100%; }
+blockquote { color: #555; border-left: 4px solid #ddd; margin-left: 0; padding-left: 12px; }
+"""
+
+_HTML_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body>
+{body}
+</body></html>
+"""
+
+_local = threading.local()
+
+
+def available() -> bool:
+    return markdown is not None and HTML is not None
+
+
+def render_html(text: str, title: str = '') -> str:
+    """把 Markdown 渲染为完整的 HTML 文档，每个线程复用一个解析器"""
+    md = getattr(_local, 'markdown', None)
+    if md is None:
+        md = _local.markdown = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+    md.reset()
+    return _HTML_TEMPLATE.format(title=html.escape(title), body=md.convert(text))
+
+
+def _stylesheet_key():
+    css_path = Config().MD_TO_PDF_CSS
+    if not css_path:
+        return None
+    return css_path, os.path.getmtime(css_path)
+
+
+def get_resources():
+    """返回 (字体配置, 样式表列表)，同一线程内样式表未变化时直接复用"""
+    key = _stylesheet_key()
+    resources = getattr(_local, 'resources', None)
+    if resources is None or resources[0] != key:
+        font_config = FontConfiguration()
+        stylesheets = [CSS(string=DEFAULT_CSS, font_config=font_config)]
+        if key is not None:
+            stylesheets.append(CSS(filename=key[0], font_config=font_config))
+        resources = _local.resources = (key, font_config, stylesheets)
+    return resources[1], resources[2]
+
+
+def markdown_to_pdf(input_path: str, output_path: str):
+    """图片等相对路径以 Markdown 文件所在目录为基准"""
+    with open(input_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    document = render_html(text, os.path.splitext(os.path.basename(input_path))[0])
+    font_config, stylesheets = get_resources()
+    HTML(string=document, base_url=os.path.dirname(os.path.abspath(input_path))).write_pdf(
+        output_path, stylesheets=stylesheets, font_config=font_config
+    )
@@ -0,0 +1,77 @@
+import io
+import os
+import time
+import logging
+
+from .base import BaseConverter
+from .sniff import real_format
+
+logger = logging.getLogger(__name__)
+
+
+class ConverterPipeline(BaseConverter):
+    """把多个转换器串联为一个转换器，中间结果只保存在内存缓冲区中
+
+    observer 为可选回调 observer(阶段序号, 输入字节数, 耗时秒)，用于统计各阶段耗时。
+    """
+
+    def __init__(self, converters, observer=None):
+        super().__init__()
+        if not converters:
+            raise ValueError("转换流水线至少需要一个转换器")
+        self.converters = list(converters)
+        self.supported_input_formats = self.converters[0].supported_input_formats
+        self.supported_output_formats = self.converters[-1].supported_output_formats
+        self.supports_stream = all(c.supports_stream for c in self.converters)
+        self.toolchain = next((c.toolchain for c in self.converters if c.toolchain), None)
+        self.observer = observer
+        self.version = '+'.join(
+            f"{type(c).__name__}:{c.version}" for c in self.converters
+        )
+
+    def get_options(self) -> dict:
+        return {type(c).__name__: c.get_options() for c in self.converters}
+
+    @staticmethod
+    def _stream_size(stream):
+        if isinstance(stream, io.BytesIO):
+            return stream.getbuffer().nbytes
+        try:
+            return os.fstat(stream.fileno()).st_size
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            return None
+
+    def _run_stage(self, index, converter, source, sink, input_format) -> bool:
+        if self.observer is None:
+            return converter.convert_stream(source, sink, input_format)
+        size = self._stream_size(source)
+        start = time.perf_counter()
+        result = converter.convert_stream(source, sink, input_format)
+        if result and size is not None:
+            self.observer(index, size, time.perf_counter() - start)
+        return result
+
+    def convert_stream(self, source, sink, input_format: str = None) -> bool:
+        current = source
+        for index, converter in enumerate(self.converters[:-1]):
+            buffer = io.BytesIO()
+            if not self._run_stage(index, converter, current, buffer, input_format):
+                logger.error(f"流水线阶段失败: {type(converter).__name__}")
+                return False
+            buffer.seek(0)
+            current = buffer
+            # 中间结果的格式为上一阶段的输出格式
+            input_format = converter.supported_output_formats[0]
+        return self._run_stage(len(self.converters) - 1, self.converters[-1], current, sink, input_format)
+
+    def convert(self, input_path: str, output_path: str) -> bool:
+        try:
+            input_format = real_format(input_path)
+            with open(input_path, 'rb') as source, open(output_path, 'wb') as sink:
+                result = self.convert_stream(source, sink, input_format)
+        except Exception as e:
+            logger.error(f"转换失败: {str(e)}")
+            result = False
+        if not result and os.path.exists(output_path):
+            os.remove(output_path)
+        return result
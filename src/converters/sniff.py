@@ -0,0 +1,173 @@
+import os
+import codecs
+import struct
+import zipfile
+import threading
+from collections import OrderedDict, namedtuple
+
+# 根据文件内容识别的格式：ext 为规范扩展名，variant 为子类型（例如 XMind 的 zen / legacy）
+FileType = namedtuple('FileType', ['ext', 'variant'])
+
+UNKNOWN = FileType(None, None)
+
+# 纯文本格式：纯文本本身就是合法的 Markdown，单列 CSV 也没有分隔符
+TEXT_FORMATS = {'.md', '.csv', '.txt'}
+
+# 读取的文件头长度
+_HEAD_BYTES = 4096
+# OLE 复合文档读取的目录扇区数
+_OLE_DIRECTORY_SECTORS = 4
+_CACHE_SIZE = 256
+
+_OLE_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+_ZIP_MAGICS = (b'PK\x03\x04', b'PK\x05\x06')
+_MARKDOWN_PREFIXES = ('#', '- ', '* ', '+ ', '> ', '```', '~~~', '|', '![', '[')
+_CSV_DELIMITERS = (',', '\t', ';')
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _utf16(name: str) -> bytes:
+    return name.encode('utf-16-le')
+
+
+def _sniff_ole(f, head: bytes) -> FileType:
+    """旧版 Office 复合文档：根据目录中的流名称区分 xls / doc / 加密的 OOXML"""
+    sector_size = 1 << struct.unpack_from('<H', head, 0x1E)[0]
+    first_directory_sector = struct.unpack_from('<I', head, 0x30)[0]
+    f.seek((first_directory_sector + 1) * sector_size)
+    directory = f.read(sector_size * _OLE_DIRECTORY_SECTORS)
+    if _utf16('Workbook') in directory or _utf16('Book\x00') in directory:
+        return FileType('.xls', 'ole')
+    if _utf16('WordDocument') in directory:
+        return FileType('.doc', 'ole')
+    if _utf16('EncryptedPackage') in directory:
+        return FileType(None, 'encrypted')
+    return FileType(None, 'ole')
+
+
+def _sniff_zip(f) -> FileType:
+    """ZIP 容器：只读取中央目录中的成员列表"""
+    try:
+        with zipfile.ZipFile(f) as zf:
+            names = set(zf.namelist())
+    except zipfile.BadZipFile:
+        return FileType(None, 'corrupt')
+    if 'word/document.xml' in names:
+        return FileType('.docx', 'ooxml')
+    if 'xl/workbook.xml' in names:
+        return FileType('.xlsx', 'macro' if 'xl/vbaProject.bin' in names else 'ooxml')
+    if 'content.json' in names:
+        return FileType('.xmind', 'zen')
+    if 'content.xml' in names and ('META-INF/manifest.xml' in names or 'meta.xml' in names):
+        return FileType('.xmind', 'legacy')
+    return FileType('.zip', None)
+
+
+def _decode_text(head: bytes):
+    """按 UTF-8（含 BOM）或 GB18030 解码文件头，不是文本时返回 None"""
+    if b'\x00' in head:
+        return None
+    for encoding in ('utf-8-sig', 'gb18030'):
+        # 文件头可能在多字节字符中间截断，使用增量解码器忽略末尾不完整的字符
+        try:
+            return codecs.getincrementaldecoder(encoding)().decode(head, final=False), encoding
+        except UnicodeDecodeError:
+            continue
+    return None
+
+
+def _sniff_text(text: str, encoding: str) -> FileType:
+    lines = [line for line in text.splitlines() if line.strip()]
+    # 最后一行可能被截断，不参与分隔符统计
+    complete = lines[:-1] if len(lines) > 1 and not text.endswith('\n') else lines
+    if any(line.lstrip().startswith(_MARKDOWN_PREFIXES) for line in lines[:20]):
+        return FileType('.md', encoding)
+    sample = complete[:20]
+    if len(sample) >= 2:
+        for delimiter in _CSV_DELIMITERS:
+            counts = {line.count(delimiter) for line in sample}
+            if len(counts) == 1 and counts.pop() > 0:
+                return FileType('.csv', encoding)
+    return FileType('.txt', encoding)
+
+
+def _sniff(file_path: str) -> FileType:
+    with open(file_path, 'rb') as f:
+        head = f.read(_HEAD_BYTES)
+        if head.startswith(b'%PDF-'):
+            return FileType('.pdf', None)
+        if head.startswith(_OLE_MAGIC):
+            return _sniff_ole(f, head)
+        if head.startswith(_ZIP_MAGICS):
+            return _sniff_zip(f)
+    if not head:
+        return FileType(None, 'empty')
+    decoded = _decode_text(head)
+    if decoded is None:
+        return UNKNOWN
+    return _sniff_text(*decoded)
+
+
+def sniff(file_path: str) -> FileType:
+    """根据文件头（和 ZIP 成员列表）识别文件的真实格式，结果按文件大小和修改时间缓存"""
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    file_type = _sniff(file_path)
+    with _cache_lock:
+        _cache[key] = file_type
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return file_type
+
+
+def real_format(file_path: str) -> str:
+    """用于选择转换路径的输入格式：优先使用识别出的格式，无法识别时使用扩展名
+
+    纯文本的 Markdown / CSV 判断是启发式的，扩展名本身是 .md / .csv 时以扩展名为准。
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    file_type = sniff(file_path)
+    if file_type.ext is None or file_type.ext == '.zip':
+        return ext
+    if file_type.ext in TEXT_FORMATS and ext in ('.md', '.csv'):
+        return ext
+    return file_type.ext
+
+
+def matches(file_type: FileType, formats, ext: str = None) -> bool:
+    """识别出的格式是否属于 formats（扩展名列表）
+
+    与 real_format 一致：纯文本的扩展名 ext 为 .md / .csv 时以扩展名为准，
+    只有无法区分的纯文本（.txt）可以匹配任一文本格式。
+    """
+    if file_type.ext is None:
+        return False
+    formats = {fmt.lower() for fmt in formats}
+    if file_type.ext in TEXT_FORMATS:
+        if ext in ('.md', '.csv'):
+            return ext in formats
+        if file_type.ext == '.txt':
+            return bool(formats & TEXT_FORMATS)
+    return file_type.ext in formats
+
+
+def describe(file_type: FileType) -> str:
+    """用于错误提示的格式名称"""
+    if file_type.variant == 'encrypted':
+        return "加密的 Office 文档"
+    if file_type.variant == 'corrupt':
+        return "损坏的压缩包"
+    if file_type.variant == 'empty':
+        return "空文件"
+    if file_type.ext is None:
+        return "无法识别的格式"
+    if file_type.ext == '.xmind':
+        return f"XMind（{'Zen' if file_type.variant == 'zen' else '旧版'}）"
+    return file_type.ext.lstrip('.').upper()
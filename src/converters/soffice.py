@@ -0,0 +1,338 @@
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import queue
+import time
+import atexit
+import logging
+from pathlib import Path
+
+from config import Config
+from toolchain import get_toolchains
+from metrics import subprocess_timer
+from storage import hold
+
+logger = logging.getLogger(__name__)
+
+# python-uno 通常随 LibreOffice 一起安装，缺失时回退到一次性 soffice 进程
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+except ImportError:
+    uno = None
+    PropertyValue = None
+
+
+def find_soffice():
+    """查找 LibreOffice 可执行文件的路径"""
+    if platform.system() == "Windows":
+        # Windows 下可能的安装路径
+        possible_paths = [
+            r"C:\Program Files\LibreOffice\program\soffice.exe",
+            r"C:\Program Files (x86)\LibreOffice\program\soffice.exe",
+            r"C:\Program Files (x86)\OpenOffice\program\soffice.exe",
+            r"C:\Program Files\OpenOffice\program\soffice.exe",
+        ]
+        for path in possible_paths:
+            if os.path.exists(path):
+                return path
+    else:
+        # Linux/Unix 系统
+        possible_commands = ['soffice', 'libreoffice']
+        for cmd in possible_commands:
+            path = shutil.which(cmd)
+            if path:
+                return path
+    return None
+
+
+_soffice_slots = None
+_slots_lock = threading.Lock()
+
+
+def _get_soffice_slots():
+    """限制同时运行的一次性 soffice 进程数量"""
+    global _soffice_slots
+    with _slots_lock:
+        if _soffice_slots is None:
+            limit = Config().SOFFICE_MAX_PARALLEL or os.cpu_count() or 1
+            _soffice_slots = threading.BoundedSemaphore(limit)
+        return _soffice_slots
+
+
+def run_soffice(input_path: str, output_path: str, soffice_path: str = None,
+                convert_to: str = 'pdf'):
+    """以一次性 soffice 进程转换单个文件
+
+    每次调用使用独立的用户配置目录和私有输出目录，同名文件并发转换互不干扰。
+    """
+    soffice_path = soffice_path or get_toolchains().path('soffice')
+    if not soffice_path:
+        raise Exception("找不到 LibreOffice，请先安装 LibreOffice")
+
+    config = Config()
+    input_path = os.path.abspath(input_path)
+    output_path = os.path.abspath(output_path)
+
+    with _get_soffice_slots():
+        job_dir = tempfile.mkdtemp(prefix='soffice_job_', dir=os.path.abspath(config.TEMP_DIR))
+        with hold(job_dir):
+            try:
+                profile_dir = os.path.join(job_dir, 'profile')
+                out_dir = os.path.join(job_dir, 'out')
+                cmd = [
+                    soffice_path,
+                    '--headless',
+                    '--norestore',
+                    f'-env:UserInstallation={Path(profile_dir).as_uri()}',
+                    '--convert-to', convert_to,
+                    '--outdir', out_dir,
+                    input_path
+                ]
+
+                logger.info(f"执行命令: {' '.join(cmd)}")
+                with subprocess_timer('soffice'):
+                    result = subprocess.run(
+                        cmd,
+                        capture_output=True,
+                        text=True,
+                        timeout=config.SOFFICE_JOB_TIMEOUT,
+                        check=False  # 不自动抛出异常
+                    )
+
+                if result.returncode != 0:
+                    raise Exception(f"LibreOffice转换失败:\n命令: {' '.join(cmd)}\n错误: {result.stderr}")
+
+                # LibreOffice 以输入文件名命名输出文件，从私有目录移动到目标路径
+                output_ext = convert_to.split(':')[0]
+                generated = os.path.join(
+                    out_dir, os.path.splitext(os.path.basename(input_path))[0] + '.' + output_ext
+                )
+                if not os.path.exists(generated):
+                    raise Exception(f"{output_ext.upper()}文件未生成: {generated}")
+                shutil.move(generated, output_path)
+            finally:
+                shutil.rmtree(job_dir, ignore_errors=True)
+
+
+def _file_url(path: str) -> str:
+    return uno.systemPathToFileUrl(os.path.abspath(path))
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _props(**kwargs):
+    props = []
+    for name, value in kwargs.items():
+        prop = PropertyValue()
+        prop.Name = name
+        prop.Value = value
+        props.append(prop)
+    return tuple(props)
+
+
+class OfficeWorker:
+    """一个常驻的 headless LibreOffice 实例，通过 UNO socket 接收转换任务"""
+
+    def __init__(self, soffice_path: str, startup_timeout: float):
+        self.soffice_path = soffice_path
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.desktop = None
+        self.profile_dir = None
+        self.jobs = 0
+
+    def start(self):
+        # 每个实例使用独立的用户配置目录，避免配置文件锁冲突
+        self.profile_dir = tempfile.mkdtemp(prefix='soffice_profile_')
+        port = _free_port()
+        cmd = [
+            self.soffice_path,
+            '--headless',
+            '--invisible',
+            '--nologo',
+            '--norestore',
+            '--nodefault',
+            '--nolockcheck',
+            f'-env:UserInstallation={_file_url(self.profile_dir)}',
+            f'--accept=socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext',
+        ]
+        logger.info(f"启动LibreOffice工作进程: 端口 {port}")
+        self.process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        self.jobs = 0
+
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            'com.sun.star.bridge.UnoUrlResolver', local_context
+        )
+        url = f'uno:socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext'
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            if self.process.poll() is not None:
+                raise Exception(f"LibreOffice工作进程启动后立即退出: {self.process.returncode}")
+            try:
+                context = resolver.resolve(url)
+                break
+            except Exception:
+                if time.monotonic() > deadline:
+                    self.stop()
+                    raise Exception("连接LibreOffice工作进程超时")
+                time.sleep(0.2)
+
+        self.desktop = context.ServiceManager.createInstanceWithContext(
+            'com.sun.star.frame.Desktop', context
+        )
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def convert(self, input_path: str, output_path: str, filter_name: str):
+        document = self.desktop.loadComponentFromURL(
+            _file_url(input_path), '_blank', 0, _props(Hidden=True, ReadOnly=True)
+        )
+        if document is None:
+            raise Exception(f"LibreOffice无法打开文件: {input_path}")
+        try:
+            document.storeToURL(_file_url(output_path), _props(FilterName=filter_name))
+        finally:
+            document.close(True)
+        self.jobs += 1
+
+    def stop(self):
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass
+            self.desktop = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+        if self.profile_dir:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+            self.profile_dir = None
+
+    def kill(self):
+        """强制结束卡死的实例，不等待 UNO 调用返回"""
+        self.desktop = None
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+        self.stop()
+
+
+class OfficePool:
+    """常驻 LibreOffice 进程池
+
+    - 工作进程按需启动，崩溃或超时的进程会被重启
+    - 每个进程处理 max_jobs 个任务后回收，限制内存增长
+    """
+
+    def __init__(self, soffice_path: str, size: int, max_jobs: int,
+                 job_timeout: float, startup_timeout: float):
+        self.max_jobs = max_jobs
+        self.job_timeout = job_timeout
+        self._workers = []
+        self._idle = queue.Queue()
+        for _ in range(size):
+            worker = OfficeWorker(soffice_path, startup_timeout)
+            self._workers.append(worker)
+            self._idle.put(worker)
+
+    def _restart(self, worker: OfficeWorker):
+        worker.kill()
+        worker.start()
+
+    def convert(self, input_path: str, output_path: str, filter_name: str):
+        input_path = os.path.abspath(input_path)
+        output_path = os.path.abspath(output_path)
+
+        worker = self._idle.get()
+        try:
+            if not worker.is_alive():
+                if worker.process is not None:
+                    logger.warning("LibreOffice工作进程已退出，正在重启")
+                self._restart(worker)
+
+            errors = []
+
+            def run():
+                try:
+                    worker.convert(input_path, output_path, filter_name)
+                except Exception as e:
+                    errors.append(e)
+
+            # UNO 调用本身没有超时，在线程中执行以便检测卡死
+            with subprocess_timer('soffice'):
+                thread = threading.Thread(target=run, daemon=True)
+                thread.start()
+                thread.join(self.job_timeout)
+
+            if thread.is_alive():
+                logger.error(f"LibreOffice转换超时({self.job_timeout}s)，重启工作进程")
+                worker.kill()
+                raise Exception(f"LibreOffice转换超时: {input_path}")
+            if errors:
+                if not worker.is_alive():
+                    worker.kill()
+                raise errors[0]
+
+            if worker.jobs >= self.max_jobs:
+                logger.info(f"LibreOffice工作进程已处理 {worker.jobs} 个任务，回收")
+                worker.stop()
+        finally:
+            self._idle.put(worker)
+
+        if not os.path.exists(output_path):
+            raise Exception(f"PDF文件未生成: {output_path}")
+
+    def shutdown(self):
+        for worker in self._workers:
+            worker.stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_office_pool():
+    """获取全局 LibreOffice 进程池，不可用时返回 None"""
+    global _pool
+    if _pool is not None:
+        return _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            return _pool
+
+        config = Config()
+        if config.SOFFICE_POOL_SIZE <= 0 or uno is None:
+            return None
+        soffice_path = get_toolchains().path('soffice')
+        if not soffice_path:
+            return None
+
+        _pool = OfficePool(
+            soffice_path,
+            size=config.SOFFICE_POOL_SIZE,
+            max_jobs=config.SOFFICE_MAX_JOBS_PER_WORKER,
+            job_timeout=config.SOFFICE_JOB_TIMEOUT,
+            startup_timeout=config.SOFFICE_STARTUP_TIMEOUT
+        )
+        atexit.register(_pool.shutdown)
+        return _pool
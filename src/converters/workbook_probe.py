@@ -0,0 +1,95 @@
+import os
+import hashlib
+import threading
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from typing import List
+
+_MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+_FINGERPRINT_BYTES = 64 * 1024
+_ZIP_MAGIC = b'PK\x03\x04'
+_CACHE_SIZE = 256
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def file_fingerprint(file_path: str) -> str:
+    """计算文件指纹：文件大小 + 内容的 SHA-256
+
+    xlsx 是 ZIP 容器，尾部的中央目录包含每个成员的 CRC32，
+    因此只读取首尾各 64KB 即可区分不同内容的工作簿，无需扫描整个文件。
+    xls 等其他格式没有这样的校验信息，读取整个文件。
+    """
+    size = os.path.getsize(file_path)
+    digest = hashlib.sha256(str(size).encode())
+    with open(file_path, 'rb') as f:
+        head = f.read(_FINGERPRINT_BYTES)
+        digest.update(head)
+        if size <= _FINGERPRINT_BYTES:
+            return digest.hexdigest()
+        if head.startswith(_ZIP_MAGIC):
+            f.seek(max(size - _FINGERPRINT_BYTES, _FINGERPRINT_BYTES))
+            digest.update(f.read())
+        else:
+            for chunk in iter(lambda: f.read(_FINGERPRINT_BYTES), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_xlsx_sheet_names(file_path: str) -> List[str]:
+    """只读取 xl/workbook.xml 中的工作表索引，忽略图表工作表"""
+    with zipfile.ZipFile(file_path) as zf:
+        # 从关系文件中找出真正的工作表（排除 chartsheet）
+        worksheet_ids = None
+        try:
+            with zf.open('xl/_rels/workbook.xml.rels') as f:
+                worksheet_ids = set()
+                for _, elem in ET.iterparse(f):
+                    if elem.tag == f'{_PKG_REL_NS}Relationship':
+                        if posixpath.basename(elem.get('Type', '')) == 'worksheet':
+                            worksheet_ids.add(elem.get('Id'))
+        except KeyError:
+            pass
+
+        names = []
+        with zf.open('xl/workbook.xml') as f:
+            for _, elem in ET.iterparse(f):
+                if elem.tag == f'{_MAIN_NS}sheet':
+                    rel_id = elem.get(f'{_REL_NS}id')
+                    if worksheet_ids is None or rel_id in worksheet_ids:
+                        names.append(elem.get('name'))
+                elif elem.tag == f'{_MAIN_NS}sheets':
+                    # 工作表索引之后的内容不需要解析
+                    break
+        return names
+
+
+def _read_sheet_names(file_path: str) -> List[str]:
+    if zipfile.is_zipfile(file_path):
+        return _read_xlsx_sheet_names(file_path)
+    # xls 等非 ZIP 格式回退到 pandas
+    import pandas as pd
+    with pd.ExcelFile(file_path) as excel_file:
+        return list(excel_file.sheet_names)
+
+
+def probe_sheet_names(file_path: str) -> List[str]:
+    """获取工作簿的工作表名称列表，结果按文件指纹缓存"""
+    key = file_fingerprint(file_path)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return list(_cache[key])
+
+    names = _read_sheet_names(file_path)
+    with _cache_lock:
+        _cache[key] = names
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return list(names)
@@ -1,99 +1,154 @@
 from .base import BaseConverter
-import xmindparser
-import xmind
-import re
+from .xmind_reader import iter_topics
+from .xmind_writer import NOTES, CHILDREN, new_topic, write_xmind
+import io
+import os
 
 class XmindToMarkdownConverter(BaseConverter):
+    version = '3'
+    supports_stream = True
+
+    # 写出 Markdown 时使用的缓冲区大小
+    WRITE_BUFFER_SIZE = 1024 * 1024
+
     def __init__(self):
         super().__init__()
         self.supported_input_formats = ['.xmind']
         self.supported_output_formats = ['.md']
     
-    def process_topic(self, topic, markdown_text, level):
-        children = topic.get('topics', ())
-        for child in children:
-            title = child['title']
-            markdown_text += "#" * (level + 1) + " " + title + "\n\n"
-            markdown_text = self.process_topic(child, markdown_text, level + 1)
-        return markdown_text
+    def iter_markdown(self, topics):
+        """把先序主题流逐行转换为 Markdown，主题备注作为正文段落输出"""
+        for topic in topics:
+            yield "#" * (topic.depth + 1) + " " + topic.title + "\n\n"
+            if topic.notes:
+                yield topic.notes.strip() + "\n\n"
+    
+    def convert_stream(self, source, sink, input_format: str = None) -> bool:
+        try:
+            # zipfile 需要可随机访问的输入
+            if not source.seekable():
+                source = io.BytesIO(source.read())
+            text = io.TextIOWrapper(sink, encoding='utf-8')
+            try:
+                text.writelines(self.iter_markdown(iter_topics(source)))
+                text.flush()
+            finally:
+                # 分离包装器，避免它被回收时关闭调用方的 sink
+                text.detach()
+            return True
+            
+        except Exception as e:
+            print(f"转换失败: {str(e)}")
+            self.record_error(e)
+            return False
     
     def convert(self, input_path: str, output_path: str) -> bool:
         try:
-            content = xmindparser.xmind_to_dict(input_path)
-            markdown_text = ""
-            markdown_title = ""
-            for sheet in content:
-                root_topic = sheet["topic"]
-                markdown_title += f"# {root_topic['title']}\n\n"
-                markdown_text += self.process_topic(root_topic, markdown_title, 1)
-                
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(markdown_text)
+            with open(output_path, 'w', encoding='utf-8', buffering=self.WRITE_BUFFER_SIZE) as f:
+                f.writelines(self.iter_markdown(iter_topics(input_path)))
             return True
             
         except Exception as e:
             print(f"转换失败: {str(e)}")
+            self.record_error(e)
             return False
 
 class MarkdownToXmindConverter(BaseConverter):
+    version = '2'
+    supports_stream = True
+
     def __init__(self):
         super().__init__()
         self.supported_input_formats = ['.md']
         self.supported_output_formats = ['.xmind']
     
-    def convert(self, input_path: str, output_path: str) -> bool:
-        try:
-            # 读取markdown文件
-            with open(input_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+    @staticmethod
+    def _heading(line: str):
+        """解析 ATX 标题行，返回 (级别, 标题)，非标题返回 None"""
+        stripped = line.lstrip('#')
+        level = len(line) - len(stripped)
+        if level == 0 or (stripped and not stripped[0].isspace()):
+            return None
+        return level, stripped.strip().rstrip('#').strip()
 
-            # 创建xmind工作簿和工作表
-            w = xmind.load(output_path)  # 如果文件不存在会创建新的
-            s1 = w.getPrimarySheet()
-            s1.setTitle("Sheet 1")
-            
-            # 确保有根主题
-            root = s1.getRootTopic()
-            if root is None:
-                root = s1.createRootTopic()
+    def parse(self, lines, default_title: str):
+        """单遍解析 Markdown 标题，构建 [(画布标题, 根节点), ...]
+
+        每个一级标题开始一个新画布；出现一级标题之前的标题挂在以文件名命名的画布下。
+        标题之间的正文作为上一个主题的备注。
+        """
+        sheets = []
+        stack = []  # [(级别, 节点)]
+        body = []
+        current = None
+        in_code = False
 
-            # 解析markdown内容
-            lines = content.split('\n')
-            current_topics = {0: root}
-            current_level = 0
+        def flush_body():
+            if current is not None and body:
+                notes = '\n'.join(body).strip()
+                if notes:
+                    current[NOTES] = notes
+            body.clear()
 
-            # 设置根节点标题
-            for line in lines:
-                if line.startswith('# ') and not line.startswith('## '):
-                    root.setTitle(line.replace('# ', '').strip())
-                    break
+        for line in lines:
+            line = line.rstrip('\r\n')
+            if ('```' in line or '~~~' in line) and line.lstrip().startswith(('```', '~~~')):
+                in_code = not in_code
+            heading = self._heading(line) if line.startswith('#') and not in_code else None
+            if heading is None:
+                if current is not None:
+                    body.append(line)
+                continue
 
-            # 处理其他标题
-            for line in lines:
-                if line.startswith('#'):
-                    level = len(re.match(r'^#+', line).group())
-                    title = line.replace('#' * level, '').strip()
+            flush_body()
+            level, title = heading
+            if level == 1:
+                current = new_topic(title)
+                sheets.append((f"Sheet {len(sheets) + 1}", current))
+                stack = [(1, current)]
+                continue
 
-                    if level > current_level:
-                        new_topic = current_topics[current_level].addSubTopic()
-                        new_topic.setTitle(title)
-                        current_topics[level] = new_topic
-                    else:
-                        parent_level = level - 1
-                        while parent_level not in current_topics and parent_level > 0:
-                            parent_level -= 1
-                        new_topic = current_topics[parent_level].addSubTopic()
-                        new_topic.setTitle(title)
-                        current_topics[level] = new_topic
-                    
-                    current_level = level
+            if not stack:
+                root = new_topic(default_title)
+                sheets.append((f"Sheet {len(sheets) + 1}", root))
+                stack = [(1, root)]
+            while len(stack) > 1 and stack[-1][0] >= level:
+                stack.pop()
+            current = new_topic(title)
+            stack[-1][1][CHILDREN].append(current)
+            stack.append((level, current))
 
-            # 保存xmind文件
-            xmind.save(w, path=output_path)
+        flush_body()
+        if not sheets:
+            sheets.append(("Sheet 1", new_topic(default_title)))
+        return sheets
+
+    def convert_stream(self, source, sink, input_format: str = None) -> bool:
+        try:
+            text = io.TextIOWrapper(source, encoding='utf-8')
+            try:
+                sheets = self.parse(text, "Central Topic")
+            finally:
+                text.detach()
+            write_xmind(sheets, sink)
             return True
             
         except Exception as e:
             print(f"转换失败: {str(e)}")
+            self.record_error(e)
             return False
 
-# 其他转换器类（DocToPDF, ExcelToCSV等）也类似实现...
+    def convert(self, input_path: str, output_path: str) -> bool:
+        try:
+            default_title = os.path.splitext(os.path.basename(input_path))[0]
+            with open(input_path, 'r', encoding='utf-8') as f:
+                sheets = self.parse(f, default_title)
+
+            # 直接写出 content.json 和 manifest，不经过 xmind 对象模型
+            write_xmind(sheets, output_path)
+            return True
+            
+        except Exception as e:
+            print(f"转换失败: {str(e)}")
+            self.record_error(e)
+            return False
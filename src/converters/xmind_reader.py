@@ -0,0 +1,214 @@
+import json
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+# ijson 为可选依赖，缺失时 content.json 整体解析后再迭代
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# sheet: 所在画布序号；depth: 0 表示画布的中心主题
+XmindTopic = namedtuple('XmindTopic', ['sheet', 'depth', 'title', 'notes', 'labels'])
+
+
+def _new_topic(sheet, depth, parent=None):
+    # parent: 尚未输出的父主题，本主题结束后暂存到它的 descendants 中；为 None 时直接输出
+    return {'sheet': sheet, 'depth': depth, 'title': None, 'notes': None,
+            'labels': [], 'emitted': False, 'parent': parent, 'descendants': []}
+
+
+def _pending_parent(parent):
+    return parent if parent is not None and not parent['emitted'] else None
+
+
+def _emit_early(topic) -> bool:
+    """进入 children 时，已读到标题且父主题已输出的主题可以立即输出，子主题随后流式输出"""
+    if topic['emitted'] or topic['parent'] is not None or topic['title'] is None:
+        return False
+    topic['emitted'] = True
+    return True
+
+
+def _end_topic(topic):
+    """主题结束：返回需要输出的主题列表，父主题尚未输出时暂存到父主题中"""
+    if topic['emitted']:
+        return []
+    topics = [_finish(topic)]
+    topics.extend(topic['descendants'])
+    if topic['parent'] is not None:
+        topic['parent']['descendants'].extend(topics)
+        return []
+    return topics
+
+
+def _finish(topic):
+    return XmindTopic(topic['sheet'], topic['depth'], topic['title'] or '',
+                      topic['notes'], tuple(topic['labels']))
+
+
+def _iter_json_events(events):
+    """从 ijson basic_parse 事件流中按先序提取主题
+
+    每个容器在栈上记录其角色，只跟踪 sheet / rootTopic / children.attached /
+    notes.plain / labels 这几类节点，其余内容直接跳过。
+    title 位于 children 之前时（XMind 和 xmind_writer 写出的文件均如此），主题在进入
+    children 时输出，子主题随读随出；title 出现在 children 之后时，该主题的子孙主题
+    暂存到主题结束再按先序输出。已输出的主题在 children 之后出现的 notes / labels 无法再补上。
+    """
+    stack = [['root', None, None]]  # [角色, 当前键, 主题记录]
+    sheet_index = -1
+
+    for event, value in events:
+        parent = stack[-1]
+
+        if event == 'map_key':
+            parent[1] = value
+            if value == 'children' and parent[0] == 'topic' and _emit_early(parent[2]):
+                yield _finish(parent[2])
+        elif event == 'string':
+            role = parent[0]
+            if role == 'topic':
+                if parent[1] == 'title':
+                    parent[2]['title'] = value
+            elif role == 'plain':
+                if parent[1] == 'content':
+                    stack[-3][2]['notes'] = value
+            elif role == 'labels':
+                stack[-2][2]['labels'].append(value)
+        elif event == 'start_map' or event == 'start_array':
+            role, key = parent[0], parent[1]
+            topic = None
+            if role == 'other':
+                new_role = 'other'
+            elif role == 'root':
+                new_role = 'sheets' if event == 'start_array' else 'sheet'
+            elif role == 'sheets':
+                new_role = 'sheet' if event == 'start_map' else 'other'
+            elif role == 'sheet' and key == 'rootTopic':
+                new_role = 'topic'
+            elif role == 'topic' and key == 'children':
+                new_role = 'children'
+            elif role == 'children' and key == 'attached':
+                new_role = 'attached'
+            elif role == 'attached' and event == 'start_map':
+                new_role = 'topic'
+            elif role == 'topic' and key == 'notes':
+                new_role = 'notes'
+            elif role == 'notes' and key == 'plain':
+                new_role = 'plain'
+            elif role == 'topic' and key == 'labels':
+                new_role = 'labels'
+            else:
+                new_role = 'other'
+
+            if new_role == 'sheet':
+                sheet_index += 1
+            elif new_role == 'topic':
+                if role == 'sheet':
+                    topic = _new_topic(sheet_index, 0)
+                else:
+                    # 栈为 ... 父主题, children, attached
+                    parent_topic = stack[-3][2]
+                    topic = _new_topic(sheet_index, parent_topic['depth'] + 1,
+                                       _pending_parent(parent_topic))
+            stack.append([new_role, None, topic])
+        elif event == 'end_map' or event == 'end_array':
+            stack.pop()
+            if parent[0] == 'topic':
+                yield from _end_topic(parent[2])
+
+
+def _iter_dict_topics(content):
+    """从已解析的 content.json 中按先序提取主题（未安装 ijson 时使用）"""
+    if isinstance(content, dict):
+        content = [content]
+    for sheet_index, sheet in enumerate(content):
+        root = sheet.get('rootTopic')
+        if not root:
+            continue
+        stack = [(root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            notes = ((node.get('notes') or {}).get('plain') or {}).get('content')
+            yield XmindTopic(sheet_index, depth, node.get('title') or '', notes,
+                             tuple(node.get('labels') or ()))
+            children = (node.get('children') or {}).get('attached') or ()
+            stack.extend((child, depth + 1) for child in reversed(children))
+
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _iter_xml_topics(f):
+    """流式解析旧版 XMind 的 content.xml"""
+    tags = []
+    topics = []
+    sheet_index = -1
+    skip_depth = 0  # 处于非 attached 的 <topics> 内（游离主题）
+
+    for event, elem in ET.iterparse(f, events=('start', 'end')):
+        tag = _local(elem.tag)
+        if event == 'start':
+            parent = tags[-1] if tags else None
+            tags.append(tag)
+            if skip_depth:
+                if tag == 'topics':
+                    skip_depth += 1
+                continue
+            if tag == 'sheet':
+                sheet_index += 1
+            elif tag == 'topics' and elem.get('type', 'attached') != 'attached':
+                skip_depth = 1
+            elif tag == 'topic':
+                if parent == 'sheet' or not topics:
+                    topics.append(_new_topic(sheet_index, 0))
+                else:
+                    topics.append(_new_topic(sheet_index, topics[-1]['depth'] + 1,
+                                             _pending_parent(topics[-1])))
+            elif tag == 'children' and parent == 'topic':
+                if _emit_early(topics[-1]):
+                    yield _finish(topics[-1])
+            continue
+
+        tags.pop()
+        parent = tags[-1] if tags else None
+        if skip_depth:
+            if tag == 'topics':
+                skip_depth -= 1
+            continue
+        if tag == 'title' and parent == 'topic':
+            topics[-1]['title'] = elem.text or ''
+        elif tag == 'plain' and parent == 'notes' and topics:
+            topics[-1]['notes'] = elem.text or ''
+        elif tag == 'label' and parent == 'labels' and topics:
+            topics[-1]['labels'].append(elem.text or '')
+        elif tag == 'topic':
+            yield from _end_topic(topics.pop())
+            elem.clear()
+        elif tag == 'sheet':
+            elem.clear()
+
+
+def iter_topics(source):
+    """按先序遍历顺序逐个读取 XMind 文件中的主题
+
+    source 可以是文件路径或可读的二进制文件对象。
+    XMind Zen 读取 content.json，旧版 XMind 读取 content.xml，
+    均直接从 ZIP 成员流式解析，不构建完整的主题树。
+    """
+    with zipfile.ZipFile(source) as zf:
+        names = set(zf.namelist())
+        if 'content.json' in names:
+            with zf.open('content.json') as f:
+                if ijson is not None:
+                    yield from _iter_json_events(ijson.basic_parse(f))
+                else:
+                    yield from _iter_dict_topics(json.load(f))
+        elif 'content.xml' in names:
+            with zf.open('content.xml') as f:
+                yield from _iter_xml_topics(f)
+        else:
+            raise ValueError("无效的XMind文件: 缺少 content.json 或 content.xml")
@@ -0,0 +1,73 @@
+import io
+import json
+import zipfile
+
+# 紧凑的主题节点: [标题, 备注, 子节点列表]
+TITLE, NOTES, CHILDREN = 0, 1, 2
+
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+_MANIFEST = {
+    'file-entries': {
+        'content.json': {},
+        'metadata.json': {},
+    }
+}
+_METADATA = {
+    'dataStructureVersion': '2',
+    'creator': {'name': 'FileMaster', 'version': '1.0'},
+}
+
+
+def new_topic(title: str):
+    return [title, None, []]
+
+
+def _write_topic_open(f, topic, topic_id, extra=''):
+    f.write('{"id":"%s","class":"topic","title":%s%s' % (
+        topic_id, _encode(topic[TITLE]), extra))
+    if topic[NOTES]:
+        f.write(',"notes":{"plain":{"content":%s}}' % _encode(topic[NOTES]))
+
+
+def _write_content(f, sheets):
+    """以显式栈逐个主题写出 content.json，不构建中间的 dict 树"""
+    counter = 0
+    f.write('[')
+    for sheet_index, (sheet_title, root) in enumerate(sheets):
+        if sheet_index:
+            f.write(',')
+        f.write('{"id":"sheet-%d","class":"sheet","title":%s,"rootTopic":' % (
+            sheet_index + 1, _encode(sheet_title)))
+
+        counter += 1
+        _write_topic_open(f, root, f'topic-{counter}',
+                          ',"structureClass":"org.xmind.ui.map.unbalanced"')
+        # 栈中保存子节点迭代器；每层在写出第一个子节点时打开 children
+        stack = [(iter(root[CHILDREN]), [False])]
+        while stack:
+            children, opened = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                f.write(']}}' if opened[0] else '}')
+                continue
+            f.write(',' if opened[0] else ',"children":{"attached":[')
+            opened[0] = True
+            counter += 1
+            _write_topic_open(f, child, f'topic-{counter}')
+            stack.append((iter(child[CHILDREN]), [False]))
+        f.write('}')
+    f.write(']')
+
+
+def write_xmind(sheets, target):
+    """把 [(画布标题, 根节点), ...] 直接写为 XMind Zen 文件
+
+    target 可以是文件路径或可写的二进制文件对象。
+    """
+    with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as zf:
+        with io.TextIOWrapper(zf.open('content.json', 'w'), encoding='utf-8') as f:
+            _write_content(f, sheets)
+        zf.writestr('metadata.json', json.dumps(_METADATA))
+        zf.writestr('manifest.json', json.dumps(_MANIFEST))
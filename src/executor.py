@@ -0,0 +1,226 @@
+import os
+import threading
+import logging
+import multiprocessing
+
+from config import Config
+import metrics
+
+logger = logging.getLogger(__name__)
+
+try:
+    import resource
+except ImportError:
+    # Windows 没有 resource 模块，无法统计子进程内存
+    resource = None
+
+
+def _init_worker():
+    """预先导入重量级依赖，避免第一个任务承担导入开销"""
+    try:
+        import pandas  # noqa: F401
+        import openpyxl  # noqa: F401
+    except ImportError:
+        pass
+    from factory import ConverterFactory
+    for converter_type in Config().PROCESS_POOL_TYPES:
+        descriptor = ConverterFactory._converters.get(converter_type)
+        if descriptor is not None:
+            descriptor.load()
+
+
+def _peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    # Linux 下 ru_maxrss 单位为 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_conversion(converter_type: str, input_path: str, output_path: str, options: dict):
+    """在工作进程中执行转换，返回 (结果, 进程峰值内存MB, 转换器捕获的异常类型)"""
+    import metrics
+    from factory import ConverterFactory
+    converter = ConverterFactory.get_converter(converter_type)
+    if options != converter.get_options():
+        converter = converter.with_options(**options)
+    with metrics.capture_errors() as record:
+        result = converter.convert(input_path, output_path)
+    return result, _peak_rss_mb(), record['error']
+
+
+def _worker_main(conn):
+    """工作进程主循环：逐个接收任务，返回 (是否成功, 结果或异常)，父进程关闭连接时退出"""
+    _init_worker()
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            break
+        try:
+            reply = (True, _run_conversion(*task))
+        except Exception as e:
+            reply = (False, e)
+        try:
+            conn.send(reply)
+        except Exception:
+            # 异常对象无法序列化时只返回类型和消息
+            conn.send((False, Exception(f"{type(reply[1]).__name__}: {reply[1]}")))
+
+
+def _get_context():
+    # fork 会复制父进程中其他线程持有的锁，使用 forkserver（Windows 上为 spawn）启动工作进程
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+
+class _Worker:
+    """一个工作进程和与它通信的管道，同一时刻只执行一个任务"""
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        # daemon 进程在主进程退出时自动结束
+        self.process = context.Process(target=_worker_main, args=(child_conn,),
+                                       name='conversion-worker', daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def call(self, task, timeout: float):
+        """执行任务，返回 (是否成功, 结果或转换器抛出的异常)
+
+        超时抛出 TimeoutError，进程异常退出或管道损坏时抛出 EOFError / OSError。
+        """
+        self.conn.send(task)
+        if not self.conn.poll(timeout):
+            raise TimeoutError
+        return self.conn.recv()
+
+    def close(self):
+        # 关闭管道后工作进程读到 EOF 自行退出
+        self.conn.close()
+        self.process.join(1)
+        if self.process.is_alive():
+            self.kill()
+
+    def kill(self):
+        self.conn.close()
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+
+
+class ConversionExecutor:
+    """CPU 密集型转换器的进程池
+
+    - 工作进程启动时预先导入 pandas 等依赖，之后持续复用
+    - 任务超时时只结束执行该任务的工作进程，其他任务不受影响
+    - 工作进程峰值内存超过上限时退出该进程，下次需要时重新启动
+    - 小文件直接在当前进程执行，避免进程间通信开销
+    """
+
+    def __init__(self, size: int, converter_types, timeout: float,
+                 max_rss_mb: float, min_bytes: int):
+        self.size = size
+        self.converter_types = set(converter_types)
+        self.timeout = timeout
+        self.max_rss_mb = max_rss_mb
+        self.min_bytes = min_bytes
+        self._idle = []
+        self._slots = threading.Semaphore(size)
+        self._lock = threading.Lock()
+        self._context = None
+
+    def _acquire(self) -> _Worker:
+        self._slots.acquire()
+        try:
+            with self._lock:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.alive():
+                        return worker
+                    worker.kill()
+                if self._context is None:
+                    self._context = _get_context()
+                context = self._context
+            return _Worker(context)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, worker: _Worker, reuse: bool):
+        try:
+            if reuse:
+                with self._lock:
+                    self._idle.append(worker)
+            else:
+                worker.close()
+        finally:
+            self._slots.release()
+
+    def should_offload(self, converter_type: str, input_path: str) -> bool:
+        if converter_type not in self.converter_types:
+            return False
+        try:
+            return os.path.getsize(input_path) >= self.min_bytes
+        except OSError:
+            return False
+
+    def run(self, converter_type: str, converter, input_path: str, output_path: str) -> bool:
+        if not self.should_offload(converter_type, input_path):
+            return converter.convert(input_path, output_path)
+
+        task = (converter_type, input_path, output_path, converter.get_options())
+        for attempt in range(2):
+            worker = self._acquire()
+            reuse = False
+            try:
+                try:
+                    ok, value = worker.call(task, self.timeout)
+                except TimeoutError:
+                    # 卡死的任务无法取消，只能结束执行它的进程
+                    logger.error(f"转换超时({self.timeout}s)，结束工作进程 {worker.process.pid}: {input_path}")
+                    worker.kill()
+                    raise Exception(f"转换超时: {input_path}")
+                except (EOFError, OSError):
+                    # 工作进程异常退出（例如因内存不足被系统结束），换一个进程重试一次
+                    worker.kill()
+                    if attempt:
+                        raise Exception(f"工作进程异常退出: {input_path}")
+                    logger.warning("工作进程异常退出，重试转换任务")
+                    continue
+
+                reuse = True
+                if not ok:
+                    # 转换器抛出的异常（包括 FileNotFoundError 等 OSError）直接交给调用方，工作进程仍然可用
+                    raise value
+                result, rss_mb, error = value
+                if error:
+                    metrics.record_error(error)
+                if rss_mb > self.max_rss_mb:
+                    logger.info(f"工作进程内存 {rss_mb:.0f}MB 超过上限，结束该进程")
+                    reuse = False
+                return result
+            finally:
+                self._release(worker, reuse)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_conversion_executor():
+    """获取全局转换进程池"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            config = Config()
+            _executor = ConversionExecutor(
+                size=config.PROCESS_POOL_SIZE or os.cpu_count() or 1,
+                converter_types=config.PROCESS_POOL_TYPES,
+                timeout=config.PROCESS_TASK_TIMEOUT,
+                max_rss_mb=config.PROCESS_MAX_RSS_MB,
+                min_bytes=config.PROCESS_MIN_FILE_BYTES
+            )
+        return _executor
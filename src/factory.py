@@ -1,62 +1,401 @@
-import platform
+import os
+import time
+import heapq
 import logging
+import shutil
+import tempfile
+import sys
+import importlib
+import importlib.util
+import threading
+from importlib.metadata import entry_points
+
+from config import Config
+from cache import get_conversion_cache
+from executor import get_conversion_executor
+from toolchain import get_toolchains
+import metrics
+import profiling
 
 logger = logging.getLogger(__name__)
 
+# 第三方转换器的 entry point 分组
+PLUGIN_GROUP = 'filemaster.converters'
+
+
+class ConverterDescriptor:
+    """转换器描述：名称、输入输出格式和实现类的位置
+
+    注册时不导入转换器模块，第一次创建实例时才导入，避免启动时加载
+    pandas、python-docx、pypandoc 等重量级依赖。
+    """
+
+    def __init__(self, name: str, target: str, input_formats, output_formats,
+                 toolchain: str = None):
+        self.name = name
+        # 实现类位置，格式为 "模块:类名"
+        self.target = target
+        self.input_formats = list(input_formats)
+        self.output_formats = list(output_formats)
+        # 依赖的外部工具，可以是返回工具名的函数，在使用时按当前配置求值
+        self._toolchain = toolchain
+        self._class = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_class(cls, name: str, converter_class):
+        """根据已导入的转换器类生成描述，用于第三方转换器"""
+        converter = converter_class()
+        descriptor = cls(
+            name,
+            f"{converter_class.__module__}:{converter_class.__qualname__}",
+            converter.supported_input_formats,
+            converter.supported_output_formats,
+            converter.toolchain
+        )
+        descriptor._class = converter_class
+        return descriptor
+
+    @property
+    def toolchain(self):
+        if callable(self._toolchain):
+            return self._toolchain()
+        return self._toolchain
+
+    @property
+    def loaded(self) -> bool:
+        return self._class is not None
+
+    def load(self):
+        """导入并返回转换器类"""
+        if self._class is None:
+            with self._lock:
+                if self._class is None:
+                    module_name, _, class_name = self.target.partition(':')
+                    self._class = getattr(importlib.import_module(module_name), class_name)
+        return self._class
+
+    def __repr__(self):
+        return f"ConverterDescriptor({self.name!r}, {self.target!r})"
+
+
+def _html_engine_installed() -> bool:
+    """html 引擎的依赖是否已安装；路径选择时调用，不为此导入 WeasyPrint"""
+    module = sys.modules.get('converters.markdown_pdf')
+    if module is not None:
+        return module.available()
+    return all(importlib.util.find_spec(name) is not None for name in ('markdown', 'weasyprint'))
+
+
+def _md_to_pdf_toolchain():
+    """md_to_pdf 按 Config.MD_TO_PDF_ENGINE 选择引擎，html 引擎不需要外部工具"""
+    engine = Config().MD_TO_PDF_ENGINE
+    if engine == 'auto':
+        engine = 'html' if _html_engine_installed() else 'latex'
+    return 'latex' if engine == 'latex' else None
+
+
+BUILTIN_CONVERTERS = [
+    ConverterDescriptor('xmind_to_md', 'converters.xmind_converter:XmindToMarkdownConverter',
+                        ['.xmind'], ['.md']),
+    ConverterDescriptor('md_to_xmind', 'converters.xmind_converter:MarkdownToXmindConverter',
+                        ['.md'], ['.xmind']),
+    ConverterDescriptor('docx_to_md', 'converters.document_converter:DocxToMarkdownConverter',
+                        ['.docx'], ['.md']),
+    ConverterDescriptor('md_to_docx', 'converters.document_converter:MarkdownToDocxConverter',
+                        ['.md'], ['.docx']),
+    ConverterDescriptor('md_to_pdf', 'converters.document_converter:MarkdownToPDFConverter',
+                        ['.md'], ['.pdf'], toolchain=_md_to_pdf_toolchain),
+    ConverterDescriptor('excel_to_csv', 'converters.excel_converter:ExcelToCSVConverter',
+                        ['.xlsx', '.xls'], ['.csv', '.zip']),
+    ConverterDescriptor('csv_to_excel', 'converters.excel_converter:CSVToExcelConverter',
+                        ['.csv'], ['.xlsx']),
+    ConverterDescriptor('xmind_to_docx', 'converters.document_converter:XmindToDocxConverter',
+                        ['.xmind'], ['.docx']),
+    # Windows 使用 docx2pdf / Excel COM，其他系统使用 LibreOffice
+    ConverterDescriptor('docx_to_pdf', 'converters.document_converter:DocxToPDFConverter',
+                        ['.docx', '.doc'], ['.pdf'], toolchain='soffice'),
+    ConverterDescriptor('excel_to_pdf', 'converters.excel_converter:ExcelToPDFConverter',
+                        ['.xlsx', '.xls'], ['.pdf'], toolchain='soffice'),
+]
+
+# 预热用的转换：(转换类型, 输入文件, 输出文件, 转换选项, 工具链)，后面的步骤可以使用前面的输出
+# 转换选项为 None 时使用默认选项，工具链为 None 时使用转换器描述中的工具链
+WARM_UP_MARKDOWN = "# FileMaster\n\n## Warm up\n\n- item\n"
+WARM_UP_CONVERSIONS = [
+    ('md_to_xmind', 'warmup.md', 'warmup.xmind', None, None),
+    ('md_to_docx', 'warmup.md', 'warmup.docx', None, None),
+    # md_to_docx 默认走原生路径，单独用 pandoc 引擎预热 pandoc
+    ('md_to_docx', 'warmup.md', 'warmup_pandoc.docx', {'engine': 'pandoc'}, 'pandoc'),
+    ('docx_to_pdf', 'warmup.docx', 'warmup_docx.pdf', None, None),
+    ('md_to_pdf', 'warmup.md', 'warmup_md.pdf', None, None),
+]
+
+
+def discover_plugins():
+    """通过 entry point 发现第三方转换器
+
+    entry point 名称为转换类型，值可以指向 ConverterDescriptor 实例（推荐，
+    不会导入转换器本身），也可以直接指向 BaseConverter 子类。
+    """
+    descriptors = []
+    for entry_point in entry_points(group=PLUGIN_GROUP):
+        try:
+            target = entry_point.load()
+            if isinstance(target, ConverterDescriptor):
+                descriptor = target
+                descriptor.name = entry_point.name
+            else:
+                descriptor = ConverterDescriptor.from_class(entry_point.name, target)
+            descriptors.append(descriptor)
+        except Exception as e:
+            logger.error(f"加载转换器插件 {entry_point.name} 失败: {str(e)}")
+    return descriptors
+
+
 class ConverterFactory:
     _converters = {}
+    # 转换器实例缓存，转换器不保存单次转换的状态，可以在线程间共享
+    _instances = {}
+    _instances_lock = threading.Lock()
+    # 格式图：输入格式 -> [(输出格式, 转换类型)]
+    _graph = None
+    # 每种转换类型的耗时统计，用于估算路由代价
+    _latency = {}
+    _latency_lock = threading.Lock()
+
+    # 未积累实测数据时的先验代价：(固定开销秒, 每字节秒)
+    PRIOR_COSTS = {
+        None: (0.01, 2e-8),
+        'pandoc': (0.3, 5e-8),
+        'soffice': (1.0, 1e-7),
+        'latex': (3.0, 1e-7),
+    }
+    # 实测数据的指数衰减系数，越小越偏向历史数据
+    LATENCY_DECAY = 0.1
     
+    @classmethod
+    def register(cls, descriptor: ConverterDescriptor):
+        """注册转换器描述，同名转换器会被覆盖"""
+        cls._converters[descriptor.name] = descriptor
+        cls._instances.pop(descriptor.name, None)
+        cls._graph = None
+
     @classmethod
     def register_converters(cls):
-        """根据环境注册可用的转换器"""
-        from converters.xmind_converter import XmindToMarkdownConverter, MarkdownToXmindConverter
-        from converters.document_converter import (
-            DocxToMarkdownConverter,
-            MarkdownToDocxConverter,
-            MarkdownToPDFConverter,
-            DocxToPDFConverter,
-            XmindToDocxConverter
-        )
-        from converters.excel_converter import (
-            ExcelToCSVConverter,
-            CSVToExcelConverter,
-            ExcelToPDFConverter
-        )
-        
-        # 基础转换器
-        cls._converters.update({
-            'xmind_to_md': XmindToMarkdownConverter,
-            'md_to_xmind': MarkdownToXmindConverter,
-            'docx_to_md': DocxToMarkdownConverter,
-            'md_to_docx': MarkdownToDocxConverter,
-            'md_to_pdf': MarkdownToPDFConverter,
-            'excel_to_csv': ExcelToCSVConverter,
-            'csv_to_excel': CSVToExcelConverter,
-            'xmind_to_docx': XmindToDocxConverter,
-        })
-        
-        # 特定平台的转换器
-        if platform.system() == "Windows":
-            cls._converters.update({
-                'docx_to_pdf': DocxToPDFConverter,
-                'excel_to_pdf': ExcelToPDFConverter,
-            })
-        else:
-            # Linux系统使用LibreOffice的转换器
-            cls._converters.update({
-                'docx_to_pdf': DocxToPDFConverter,
-                'excel_to_pdf': ExcelToPDFConverter,
-            })
-    
+        """注册内置转换器和通过 entry point 安装的第三方转换器
+
+        只登记描述信息，转换器模块在第一次使用时才导入。
+        """
+        for descriptor in BUILTIN_CONVERTERS:
+            cls.register(descriptor)
+        if Config().LOAD_CONVERTER_PLUGINS:
+            for descriptor in discover_plugins():
+                cls.register(descriptor)
+
     @classmethod
     def get_converter(cls, converter_type: str):
+        """返回共享的转换器实例，第一次使用时创建"""
+        converter = cls._instances.get(converter_type)
+        if converter is not None:
+            return converter
+
         if not cls._converters:
             cls.register_converters()
             
-        converter_class = cls._converters.get(converter_type)
-        if not converter_class:
+        descriptor = cls._converters.get(converter_type)
+        if not descriptor:
             raise ValueError(f"不支持的转换类型: {converter_type}")
-        return converter_class()
+        with cls._instances_lock:
+            converter = cls._instances.get(converter_type)
+            if converter is None:
+                converter = descriptor.load()()
+                cls._instances[converter_type] = converter
+        return converter
+
+    @classmethod
+    def warm_up(cls):
+        """对每种可用的工具执行一次小文件转换
+
+        提前导入依赖、启动 LibreOffice 进程池并完成工具探测，
+        避免第一个用户请求承担这些开销。不经过结果缓存。
+        """
+        toolchains = get_toolchains()
+        toolchains.probe()
+        work_dir = tempfile.mkdtemp(prefix='warmup_', dir=os.path.abspath(Config().TEMP_DIR))
+        try:
+            with open(os.path.join(work_dir, 'warmup.md'), 'w', encoding='utf-8') as f:
+                f.write(WARM_UP_MARKDOWN)
+            for converter_type, input_name, output_name, options, toolchain in WARM_UP_CONVERSIONS:
+                descriptor = cls._converters.get(converter_type)
+                input_path = os.path.join(work_dir, input_name)
+                if descriptor is None or not toolchains.available(toolchain or descriptor.toolchain) \
+                        or not os.path.exists(input_path):
+                    continue
+                name = f"{converter_type}（{toolchain}）" if toolchain else converter_type
+                converter = cls.get_converter(converter_type)
+                if options:
+                    converter = converter.with_options(**options)
+                start = time.perf_counter()
+                try:
+                    result = converter.convert(input_path, os.path.join(work_dir, output_name))
+                except Exception as e:
+                    result = False
+                    logger.warning(f"预热 {name} 出错: {str(e)}")
+                logger.info(f"预热 {name}: {'成功' if result else '失败'}，"
+                            f"耗时 {time.perf_counter() - start:.2f}s")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    @classmethod
+    def convert(cls, converter_type: str, input_path: str, output_path: str,
+                options: dict = None, profile: bool = False) -> bool:
+        """执行转换，相同输入的结果直接从缓存返回
+
+        options 为本次请求的转换选项，例如 {'engine': 'html'}
+        profile 为 True 时跳过缓存，在当前进程中执行并保存性能分析结果
+        """
+        converter = cls.get_converter(converter_type)
+        if options:
+            converter = converter.with_options(**options)
+        return cls._convert_cached(converter_type, converter, input_path, output_path, profile)
+
+    @classmethod
+    def _convert_cached(cls, cache_type: str, converter, input_path: str, output_path: str,
+                        profile: bool = False) -> bool:
+        """经过结果缓存执行转换，CPU 密集型转换交给进程池，并记录耗时"""
+        def run(input_path, output_path):
+            start = time.perf_counter()
+            with metrics.track_conversion(cache_type, input_path, output_path) as record:
+                if profile or profiling.sampled():
+                    # 性能分析只能覆盖当前进程，不交给进程池
+                    with profiling.profile_conversion(cache_type, input_path, record, wait=profile):
+                        result = converter.convert(input_path, output_path)
+                else:
+                    result = get_conversion_executor().run(cache_type, converter, input_path, output_path)
+                record['result'] = result
+            if result and cache_type in cls._converters:
+                cls.record_latency(cache_type, os.path.getsize(input_path), time.perf_counter() - start)
+            return result
+
+        cache = get_conversion_cache()
+        if cache is None or profile:
+            return run(input_path, output_path)
+        return cache.convert(cache_type, converter, input_path, output_path, run=run)
+
+    @classmethod
+    def record_latency(cls, converter_type: str, nbytes: int, seconds: float):
+        """记录一次转换的输入大小和耗时
+
+        对 (字节数, 耗时) 做指数衰减加权的线性回归，得到固定开销和每字节耗时。
+        """
+        decay = cls.LATENCY_DECAY
+        with cls._latency_lock:
+            stats = cls._latency.setdefault(converter_type, [0.0, 0.0, 0.0, 0.0, 0.0])
+            for i, value in enumerate((1.0, nbytes, seconds, nbytes * nbytes, nbytes * seconds)):
+                stats[i] = stats[i] * (1 - decay) + value * decay
+
+    @classmethod
+    def estimate_cost(cls, converter_type: str, nbytes: int) -> float:
+        """估算某转换类型处理 nbytes 字节输入的耗时（秒）"""
+        fixed, per_byte = cls.PRIOR_COSTS.get(
+            cls._converters[converter_type].toolchain, cls.PRIOR_COSTS[None]
+        )
+        with cls._latency_lock:
+            stats = cls._latency.get(converter_type)
+        if stats:
+            n, sx, sy, sxx, sxy = stats
+            mean_x, mean_y = sx / n, sy / n
+            variance = sxx / n - mean_x * mean_x
+            if variance > 1e-9 * max(mean_x * mean_x, 1.0):
+                per_byte = max((sxy / n - mean_x * mean_y) / variance, 0.0)
+                fixed = max(mean_y - per_byte * mean_x, 0.0)
+            else:
+                # 样本大小相同时无法拟合斜率，按平均耗时等比例估算
+                per_byte = mean_y / max(mean_x, 1.0)
+                fixed = 0.0
+        return fixed + per_byte * nbytes
+
+    @classmethod
+    def _build_graph(cls):
+        if not cls._converters:
+            cls.register_converters()
+        graph = {}
+        for converter_type, descriptor in cls._converters.items():
+            for input_format in descriptor.input_formats:
+                for output_format in descriptor.output_formats:
+                    if input_format != output_format:
+                        graph.setdefault(input_format, []).append((output_format, converter_type))
+        cls._graph = graph
+        return graph
+
+    @classmethod
+    def route(cls, input_format: str, output_format: str, nbytes: int = 0) -> list:
+        """查找代价最低的转换路径，返回转换类型列表
+
+        依赖的外部工具未安装的转换不参与路径选择。
+        例如 ConverterFactory.route('.xmind', '.pdf') -> ['xmind_to_md', 'md_to_pdf']
+        """
+        graph = cls._graph or cls._build_graph()
+        source = input_format.lower()
+        target = output_format.lower()
+        if source == target:
+            return []
+
+        toolchains = get_toolchains()
+        usable = {}
+
+        def is_usable(converter_type):
+            if converter_type not in usable:
+                usable[converter_type] = toolchains.available(cls._converters[converter_type].toolchain)
+            return usable[converter_type]
+
+        # Dijkstra，假设中间结果大小与输入相近
+        best = {source: 0.0}
+        heap = [(0.0, source, [])]
+        while heap:
+            cost, fmt, path = heapq.heappop(heap)
+            if fmt == target:
+                return path
+            if cost > best.get(fmt, float('inf')):
+                continue
+            for next_format, converter_type in graph.get(fmt, ()):
+                if not is_usable(converter_type):
+                    continue
+                next_cost = cost + cls.estimate_cost(converter_type, nbytes)
+                if next_cost < best.get(next_format, float('inf')):
+                    best[next_format] = next_cost
+                    heapq.heappush(heap, (next_cost, next_format, path + [converter_type]))
+        raise ValueError(f"不支持的转换: {input_format} -> {output_format}")
+
+    @classmethod
+    def get_route_converter(cls, input_format: str, output_format: str, nbytes: int = 0):
+        """按最优路径返回转换器，多步路径组合为内存流水线"""
+        from converters.pipeline import ConverterPipeline
+
+        path = cls.route(input_format, output_format, nbytes)
+        if not path:
+            raise ValueError(f"输入与输出格式相同: {input_format}")
+        if len(path) == 1:
+            return path[0], cls.get_converter(path[0])
+
+        def observer(index, stage_bytes, seconds):
+            cls.record_latency(path[index], stage_bytes, seconds)
+
+        converters = [cls.get_converter(converter_type) for converter_type in path]
+        return '>'.join(path), ConverterPipeline(converters, observer=observer)
+
+    @classmethod
+    def convert_to(cls, input_path: str, output_path: str, profile: bool = False) -> bool:
+        """根据输入文件的真实格式和输出文件的扩展名自动选择最优路径进行转换"""
+        from converters.sniff import real_format
+
+        input_format = real_format(input_path)
+        output_format = os.path.splitext(output_path)[1]
+        route_name, converter = cls.get_route_converter(
+            input_format, output_format, os.path.getsize(input_path)
+        )
+        return cls._convert_cached(route_name, converter, input_path, output_path, profile)
 
 # 初始化时注册转换器
 ConverterFactory.register_converters()
@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import uuid
+import threading
+import logging
+from collections import deque, Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+from factory import ConverterFactory
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# 任务状态
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+STATUS_TEXT = {
+    QUEUED: '排队中',
+    RUNNING: '转换中',
+    DONE: '转换成功',
+    FAILED: '转换失败',
+}
+
+
+class ServerBusyError(Exception):
+    """任务队列已满"""
+
+
+class JobManager:
+    """后台转换任务队列
+
+    - submit 立即返回任务ID，转换在后台线程中执行
+    - 每种转换类型有独立的并发上限，排队任务超过上限时拒绝新任务
+    - 任务状态保存为 JSON 文件，页面刷新或服务重启后仍可查询
+    - 结束超过 retention 秒的任务从内存中移除，之后从磁盘查询
+    """
+
+    def __init__(self, jobs_dir: str, workers: int, max_queue: int,
+                 type_limits: dict = None, retention: float = None):
+        self.jobs_dir = jobs_dir
+        self.retention = retention
+        self.workers = workers
+        self.max_queue = max_queue
+        self.type_limits = type_limits or {}
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._runners = {}
+        self._pending = deque()
+        self._running = Counter()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        os.makedirs(jobs_dir, exist_ok=True)
+
+    def _job_file(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _save(self, job: dict):
+        path = self._job_file(job['id'])
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def submit(self, converter_type: str, input_path, output_path: str, runner=None) -> str:
+        """提交任务
+
+        runner 为可选的执行函数 runner(input_path, output_path) -> bool，
+        默认调用 ConverterFactory.convert
+        """
+        job = {
+            'id': uuid.uuid4().hex,
+            'converter_type': converter_type,
+            'input_path': input_path,
+            'output_path': output_path,
+            'status': QUEUED,
+            'message': STATUS_TEXT[QUEUED],
+            'created': time.time(),
+            'started': None,
+            'finished': None,
+        }
+        with self._lock:
+            if len(self._pending) >= self.max_queue:
+                raise ServerBusyError("服务器繁忙，请稍后重试")
+            self._prune(job['created'])
+            self._jobs[job['id']] = job
+            if runner is not None:
+                self._runners[job['id']] = runner
+            self._save(job)
+            self._pending.append(job['id'])
+            self._dispatch()
+        return job['id']
+
+    def _prune(self, now: float):
+        """移除结束超过 retention 秒的任务，调用方持有锁"""
+        if self.retention is None:
+            return
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['finished'] is not None and now - job['finished'] > self.retention]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _dispatch(self):
+        """把可以运行的排队任务交给工作线程，调用方需持有锁"""
+        total = sum(self._running.values())
+        for job_id in list(self._pending):
+            if total >= self.workers:
+                break
+            converter_type = self._jobs[job_id]['converter_type']
+            limit = self.type_limits.get(converter_type, self.workers)
+            if self._running[converter_type] >= limit:
+                continue
+            self._pending.remove(job_id)
+            self._running[converter_type] += 1
+            total += 1
+            self._executor.submit(self._run, job_id)
+
+    def _update(self, job: dict, **fields):
+        with self._lock:
+            job.update(fields)
+            self._save(job)
+
+    def _run(self, job_id: str):
+        job = self._jobs[job_id]
+        self._update(job, status=RUNNING, message=STATUS_TEXT[RUNNING], started=time.time())
+        metrics.QUEUE_WAIT_SECONDS.observe(job['started'] - job['created'], job['converter_type'])
+        runner = self._runners.pop(job_id, None)
+        try:
+            if runner is not None:
+                result = runner(job['input_path'], job['output_path'])
+            else:
+                result = ConverterFactory.convert(job['converter_type'], job['input_path'], job['output_path'])
+            if result:
+                self._update(job, status=DONE, message=STATUS_TEXT[DONE], finished=time.time())
+            else:
+                self._update(job, status=FAILED, message=STATUS_TEXT[FAILED], finished=time.time())
+        except Exception as e:
+            logger.error(f"任务 {job_id} 执行失败: {str(e)}")
+            self._update(job, status=FAILED, message=f"转换失败: {str(e)}", finished=time.time())
+        finally:
+            with self._lock:
+                self._running[job['converter_type']] -= 1
+                self._dispatch()
+
+    def get(self, job_id: str):
+        """查询任务状态，内存中没有时从磁盘读取"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+
+        path = self._job_file(job_id)
+        if not job_id.isalnum() or not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            job = json.load(f)
+        if job['status'] in (QUEUED, RUNNING):
+            # 上一次运行的服务进程已退出，任务不会再完成
+            job['status'] = FAILED
+            job['message'] = "服务重启，任务已中断，请重新提交"
+        return job
+
+    def queue_length(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def active_paths(self) -> set:
+        """排队中和执行中任务的输入、输出路径，多文件任务还包括输入所在目录"""
+        paths = set()
+        with self._lock:
+            for job in self._jobs.values():
+                if job['status'] not in (QUEUED, RUNNING):
+                    continue
+                inputs = job['input_path']
+                if isinstance(inputs, (list, tuple)):
+                    paths.update(inputs)
+                    paths.update(os.path.dirname(path) for path in inputs)
+                else:
+                    paths.add(inputs)
+                paths.add(job['output_path'])
+        return paths
+
+    def running_counts(self) -> dict:
+        """各转换类型正在执行的任务数"""
+        with self._lock:
+            return {(converter_type,): count for converter_type, count in self._running.items()}
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """获取全局任务队列"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            config = Config()
+            _manager = JobManager(
+                config.JOBS_DIR,
+                workers=config.JOB_WORKERS,
+                max_queue=config.JOB_QUEUE_SIZE,
+                type_limits=config.JOB_TYPE_LIMITS,
+                retention=config.JOB_RETENTION_SECONDS
+            )
+        return _manager
+
+
+metrics.REGISTRY.register(metrics.Gauge(
+    'filemaster_job_queue_length', '排队中的后台任务数',
+    lambda: _manager.queue_length() if _manager else None))
+metrics.REGISTRY.register(metrics.Gauge(
+    'filemaster_jobs_running', '正在执行的后台任务数',
+    lambda: _manager.running_counts() if _manager else None, ['converter']))
@@ -1,12 +1,20 @@
 import gradio as gr
 import os
-import shutil
 import datetime
 import hashlib
+import uuid
+import time
+import inspect
+import threading
 import logging
-import pandas as pd  # 添加这行
 from config import Config
 from factory import ConverterFactory
+from jobs import get_job_manager, ServerBusyError, DONE, QUEUED, RUNNING
+from batch import expand_inputs, run_batch
+from converters.workbook_probe import probe_sheet_names
+from converters.sniff import sniff, describe
+from metrics import metrics_route, start_metrics_server
+from storage import ingest_file, hold, start_janitor
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -66,101 +74,183 @@ def get_timestamp():
     return datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
 
 def get_filename_with_timestamp(filename):
-    """为文件名添加时间戳"""
+    """为文件名添加时间戳和随机后缀（同一秒内上传的同名文件互不覆盖）"""
     name, ext = os.path.splitext(filename)
-    return f"{name}_{get_timestamp()}{ext}"
+    return f"{name}_{get_timestamp()}_{uuid.uuid4().hex[:8]}{ext}"
+
+# 菜单选项 -> (转换类型, 输出扩展名, 格式不符时的提示)
+MENU_CONVERSIONS = {
+    "docx转PDF": ('docx_to_pdf', '.pdf', "请上传Word文件"),
+    "docx转markdown": ('docx_to_md', '.md', "请上传Word文件（.docx）"),
+    "Markdown转Word": ('md_to_docx', '.docx', "请上传Markdown文件"),
+    "Markdown转PDF": ('md_to_pdf', '.pdf', "请上传Markdown文件"),
+    "Xmind转Markdown": ('xmind_to_md', '.md', "请上传.xmind文件"),
+    "Markdown转Xmind": ('md_to_xmind', '.xmind', "请上传.md文件"),
+    "Xmind转Word": ('xmind_to_docx', '.docx', "请上传.xmind文件"),
+    "Excel转CSV": ('excel_to_csv', '.csv', "请上传Excel文件"),
+    "CSV转Excel": ('csv_to_excel', '.xlsx', "请上传CSV文件"),
+    "Excel转PDF": ('excel_to_pdf', '.pdf', "请上传Excel文件"),
+}
 
-def convert_file_web(file_obj, menu_option):
-    """处理文件转换"""
-    try:
-        ensure_dirs()
-        if file_obj is None:
-            return None, "请选择要转换的文件"
-            
-        original_filename = os.path.basename(file_obj.name)
-        timestamped_filename = get_filename_with_timestamp(original_filename)
-        file_name, file_ext = os.path.splitext(original_filename)
-        input_path = os.path.join(INPUT_DIR, timestamped_filename)
-        shutil.copy2(file_obj.name, input_path)
-
-        converter_type = None
-        output_ext = None
-        
-        # 根据菜单选项选择转换器
-        if menu_option == "docx转PDF":
-            if not file_ext.lower() in ['.doc', '.docx']:
-                return None, "请上传Word文件"
-            converter_type = 'docx_to_pdf'
-            output_ext = '.pdf'
-        elif menu_option == "docx转markdown":
-            if not file_ext.lower() in ['.doc', '.docx']:
-                return None, "请上传Word文件"
-            converter_type = 'docx_to_md'
-            output_ext = '.md'
-        elif menu_option == "Markdown转Word":
-            if not file_ext.lower() == '.md':
-                return None, "请上传Markdown文件"
-            converter_type = 'md_to_docx'
-            output_ext = '.docx'
-        elif menu_option == "Markdown转PDF":
-            if not file_ext.lower() == '.md':
-                return None, "请上传Markdown文件"
-            converter_type = 'md_to_pdf'
-            output_ext = '.pdf'
-        elif menu_option == "Xmind转Markdown":
-            if not file_ext.lower() == '.xmind':
-                return None, "请上传.xmind文件"
-            converter_type = 'xmind_to_md'
-            output_ext = '.md'
-            
-        elif menu_option == "Markdown转Xmind":
-            if not file_ext.lower() == '.md':
-                return None, "请上传.md文件"
-            converter_type = 'md_to_xmind' 
-            output_ext = '.xmind'
-            
-        # 在选择转换器的代码块中添加新的选项
-        if menu_option == "Xmind转Word":
-            if not file_ext.lower() == '.xmind':
-                return None, "请上传.xmind文件"
-            converter_type = 'xmind_to_docx'
-            output_ext = '.docx'
-            
-        # 添加新的转换选项
-        elif menu_option == "Excel转CSV":
-            if not file_ext.lower() in ['.xlsx', '.xls']:
-                return None, "请上传Excel文件"
-            converter_type = 'excel_to_csv'
-            # 如果Excel有多个sheet，使用zip扩展名
-            excel_file = pd.ExcelFile(file_obj.name)
-            output_ext = '.zip' if len(excel_file.sheet_names) > 1 else '.csv'
-        elif menu_option == "CSV转Excel":
-            if not file_ext.lower() == '.csv':
-                return None, "请上传CSV文件"
-            converter_type = 'csv_to_excel'
-            output_ext = '.xlsx'
-        elif menu_option == "Excel转PDF":
-            if not file_ext.lower() in ['.xlsx', '.xls']:
-                return None, "请上传Excel文件"
-            converter_type = 'excel_to_pdf'
-            output_ext = '.pdf'
-            
-        # ...其他转换类型的处理...
+
+def resolve_conversion(menu_option, input_path):
+    """根据菜单选项选择转换器，按文件内容（而不是扩展名）检查格式
+
+    扩展名写错的文件（例如实际是 xlsx 的 .xls、CSV 内容的 .txt）按真实格式处理，
+    格式不符的文件在转换前直接拒绝。
+    返回 (转换类型, 输出扩展名, 错误信息)
+    """
+    if menu_option not in MENU_CONVERSIONS:
+        return None, None, "不支持的转换类型"
+    converter_type, output_ext, message = MENU_CONVERSIONS[menu_option]
+
+    if not ConverterFactory.get_converter(converter_type).validate_format(input_path):
+        return None, None, f"{message}，检测到的文件格式: {describe(sniff(input_path))}"
+
+    if converter_type == 'excel_to_csv' and len(probe_sheet_names(input_path)) > 1:
+        # 如果Excel有多个sheet，使用zip扩展名（只读取工作表索引）
+        output_ext = '.zip'
+    return converter_type, output_ext, None
+
+
+def conversion_options(menu_option, pdf_engine):
+    """页面上选择的转换选项，默认值返回 None"""
+    if menu_option == "Markdown转PDF" and pdf_engine in ('html', 'latex'):
+        return {'engine': pdf_engine}
+    return None
+
+
+def prepare_conversion(file_obj, menu_option):
+    """保存上传文件并根据菜单选项选择转换器
+
+    返回 (转换类型, 输入路径, 输出路径, 错误信息)，出错时前三项为 None
+    """
+    ensure_dirs()
+    if file_obj is None:
+        return None, None, None, "请选择要转换的文件"
         
-        if converter_type and output_ext:
-            output_path = os.path.join(OUTPUT_DIR, f"{file_name}_{get_timestamp()}{output_ext}")
-            converter = ConverterFactory.get_converter(converter_type)
-            if converter.convert(input_path, output_path):
+    original_filename = os.path.basename(file_obj.name)
+    timestamped_filename = get_filename_with_timestamp(original_filename)
+    file_name = os.path.splitext(original_filename)[0]
+    input_path = os.path.join(INPUT_DIR, timestamped_filename)
+    ingest_file(file_obj.name, input_path)
+
+    converter_type, output_ext, error = resolve_conversion(menu_option, input_path)
+    if error:
+        os.remove(input_path)
+        return None, None, None, error
+    output_path = os.path.join(OUTPUT_DIR, get_filename_with_timestamp(file_name + output_ext))
+    return converter_type, input_path, output_path, None
+
+
+def convert_file_web(file_obj, menu_option, pdf_engine=None):
+    """同步处理文件转换"""
+    try:
+        converter_type, input_path, output_path, error = prepare_conversion(file_obj, menu_option)
+        if error:
+            return None, error
+        options = conversion_options(menu_option, pdf_engine)
+        with hold(input_path, output_path):
+            if ConverterFactory.convert(converter_type, input_path, output_path, options=options):
                 return output_path, "转换成功"
-            else:
-                return None, "转换失败"
-                
-        return None, "不支持的转换类型"
+        return None, "转换失败"
         
     except Exception as e:
         return None, f"转换失败: {str(e)}"
 
 
+def submit_conversion_web(file_obj, menu_option, pdf_engine=None):
+    """提交后台转换任务，立即返回任务ID"""
+    try:
+        converter_type, input_path, output_path, error = prepare_conversion(file_obj, menu_option)
+        if error:
+            return "", error
+        options = conversion_options(menu_option, pdf_engine)
+        runner = None
+        if options:
+            def runner(input_path, output_path):
+                return ConverterFactory.convert(converter_type, input_path, output_path, options=options)
+        job_id = get_job_manager().submit(converter_type, input_path, output_path, runner=runner)
+        return job_id, "任务已提交，正在排队"
+        
+    except ServerBusyError as e:
+        return "", str(e)
+    except Exception as e:
+        return "", f"提交失败: {str(e)}"
+
+
+def submit_batch_web(file_objs, menu_option, pdf_engine=None):
+    """提交批量转换任务：多个文件或 ZIP 包并行转换，结果打包为一个 ZIP"""
+    try:
+        ensure_dirs()
+        if not file_objs:
+            return "", "请选择要转换的文件"
+        if not menu_option:
+            return "", "请先选择转换功能"
+            
+        batch_dir = os.path.join(INPUT_DIR, f"batch_{get_timestamp()}_{uuid.uuid4().hex[:8]}")
+        os.makedirs(batch_dir, exist_ok=True)
+        paths = []
+        for file_obj in file_objs:
+            # 每个上传文件放在单独的子目录中，同名文件互不覆盖
+            file_dir = os.path.join(batch_dir, str(len(paths)))
+            os.makedirs(file_dir)
+            input_path = os.path.join(file_dir, os.path.basename(file_obj.name))
+            ingest_file(file_obj.name, input_path)
+            paths.append(input_path)
+        result_path = os.path.join(OUTPUT_DIR, get_filename_with_timestamp("batch.zip"))
+
+        def resolve(name, input_path):
+            return resolve_conversion(menu_option, input_path)
+
+        def runner(input_paths, output_path):
+            inputs = expand_inputs(input_paths, batch_dir)
+            summary = run_batch(inputs, resolve, output_path,
+                                options=conversion_options(menu_option, pdf_engine))
+            # 全部文件都失败时任务记为失败
+            return summary['succeeded'] > 0
+
+        job_id = get_job_manager().submit('batch', paths, result_path, runner=runner)
+        return job_id, f"批量任务已提交（{len(paths)} 个上传文件），正在排队"
+        
+    except ServerBusyError as e:
+        return "", str(e)
+    except Exception as e:
+        return "", f"提交失败: {str(e)}"
+
+
+def watch_job_web(job_id):
+    """持续推送任务状态，任务结束（或不存在）后返回"""
+    if not (job_id or "").strip():
+        # 提交失败时没有任务ID，保留提交时的提示信息
+        yield gr.update(), gr.update()
+        return
+    interval = Config().JOB_POLL_INTERVAL
+    while True:
+        job, result = _query_job(job_id)
+        yield result
+        if job is None or job['status'] not in (QUEUED, RUNNING):
+            return
+        time.sleep(interval)
+
+
+def _query_job(job_id):
+    """查询后台任务状态，返回 (任务, (结果文件, 状态信息))，完成后结果文件为输出路径"""
+    job_id = (job_id or "").strip()
+    if not job_id:
+        return None, (None, "请输入任务ID")
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return None, (None, "任务不存在")
+    if job['status'] == DONE:
+        if not os.path.exists(job['output_path']):
+            return job, (None, "转换结果已超过保留时间被清理，请重新提交")
+        return job, (job['output_path'], job['message'])
+    if job['status'] == QUEUED:
+        return job, (None, f"{job['message']}，当前排队任务数: {get_job_manager().queue_length()}")
+    return job, (None, job['message'])
+
+
 def parse_menu_file(file_path):
     """解析markdown菜单文件为三级树形结构"""
     menu_tree = []
@@ -370,7 +460,19 @@ with gr.Blocks(
                     title = gr.Markdown("## 功能标题")
                     description = gr.Markdown("功能描述")
                     file_input = gr.File(label="选择文件")
+                    pdf_engine = gr.Radio(
+                        choices=["默认", "html", "latex"],
+                        value="默认",
+                        label="PDF 引擎（html 速度快，latex 排版更精细）",
+                        visible=False
+                    )
                     convert_btn = gr.Button("开始处理", variant="primary")
+                    with gr.Accordion("批量转换", open=False):
+                        batch_input = gr.File(label="选择多个文件或ZIP压缩包", file_count="multiple")
+                        batch_btn = gr.Button("批量处理")
+                    with gr.Row():
+                        job_id_box = gr.Textbox(label="任务ID", placeholder="提交后自动填写并刷新状态，刷新页面后可粘贴任务ID查询")
+                        query_btn = gr.Button("查询结果")
                     output_msg = gr.Textbox(label="状态信息")
                     output_file = gr.File(label="处理结果")
 
@@ -394,10 +496,32 @@ with gr.Blocks(
     )
     
     
-    # 处理文件转换
+    # 提交后台转换任务，请求立即返回
     convert_btn.click(
-        fn=convert_file_web,
-        inputs=[file_input, l3_menu],
+        fn=submit_conversion_web,
+        inputs=[file_input, l3_menu, pdf_engine],
+        outputs=[job_id_box, output_msg]
+    ).then(
+        fn=watch_job_web,
+        inputs=[job_id_box],
+        outputs=[output_file, output_msg]
+    )
+    
+    # 提交批量转换任务
+    batch_btn.click(
+        fn=submit_batch_web,
+        inputs=[batch_input, l3_menu, pdf_engine],
+        outputs=[job_id_box, output_msg]
+    ).then(
+        fn=watch_job_web,
+        inputs=[job_id_box],
+        outputs=[output_file, output_msg]
+    )
+    
+    # 查询任务状态和结果
+    query_btn.click(
+        fn=watch_job_web,
+        inputs=[job_id_box],
         outputs=[output_file, output_msg]
     )
 
@@ -444,31 +568,51 @@ with gr.Blocks(
             return (
                 gr.update(visible=False),
                 gr.update(value=""),
-                gr.update(value="")
+                gr.update(value=""),
+                gr.update(visible=False)
             )
         
         return (
             gr.update(visible=True),
             gr.update(value=f"## {selected_option}"),
-            gr.update(value="请上传需要转换的文件")
+            gr.update(value="请上传需要转换的文件"),
+            gr.update(visible=selected_option == "Markdown转PDF")
         )
 
     # 绑定三级菜单变化事件
     l3_menu.change(
         fn=update_content_area,
         inputs=[l3_menu],
-        outputs=[content_group, title, description]
+        outputs=[content_group, title, description, pdf_engine]
     )
 
 def main():
     try:
         system = FileProcessingSystem()
+        config = Config()
+        launch_options = {}
+        if config.METRICS_ENABLED:
+            if 'app_kwargs' in inspect.signature(demo.launch).parameters:
+                # 与 Gradio 应用共用端口
+                launch_options['app_kwargs'] = {'routes': [metrics_route()]}
+            else:
+                start_metrics_server(config.METRICS_HOST, config.METRICS_PORT)
+        start_janitor(
+            {'input': INPUT_DIR, 'output': OUTPUT_DIR, 'temp': config.TEMP_DIR, 'jobs': config.JOBS_DIR},
+            in_use=get_job_manager().active_paths
+        )
+        if config.WARM_UP_ON_STARTUP:
+            # 后台预热，不推迟服务启动
+            threading.Thread(target=ConverterFactory.warm_up, daemon=True).start()
+        # 任务状态通过生成器持续推送，需要启用队列
+        demo.queue()
         demo.launch(
             server_name="0.0.0.0",  # 改为本地回环地址
             server_port=7860,
             share=True,             # 启用分享链接
             debug=True,
-            show_api=False         # 关闭 API 文档
+            show_api=False,        # 关闭 API 文档
+            **launch_options
         )
     except Exception as e:
         logging.error(f"程序启动失败: {str(e)}")
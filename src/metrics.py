@@ -0,0 +1,261 @@
+import os
+import time
+import threading
+import logging
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# 转换耗时直方图的桶（秒）
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# 排队等待时间直方图的桶（秒）
+QUEUE_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 300, 600)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {value:g}"
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # 标签值 -> [各桶计数..., 总和, 总数]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        for label_values, state in items:
+            for index, bound in enumerate(self.buckets):
+                labels = _format_labels(self.labels, label_values, [('le', f'{bound:g}')])
+                yield f"{self.name}_bucket{labels} {state[index]}"
+            labels = _format_labels(self.labels, label_values, [('le', '+Inf')])
+            yield f"{self.name}_bucket{labels} {state[-1]}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {state[-2]:g}"
+            yield f"{self.name}_count{labels} {state[-1]}"
+
+
+class Gauge:
+    """读取时调用 callback 取值，callback 返回数值或 {标签值元组: 数值}"""
+
+    def __init__(self, name: str, help_text: str, callback, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.callback = callback
+        self.labels = tuple(labels)
+
+    def render(self):
+        try:
+            value = self.callback()
+        except Exception as e:
+            logger.debug(f"读取指标 {self.name} 失败: {str(e)}")
+            return
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} gauge"
+        if isinstance(value, dict):
+            for label_values, item in sorted(value.items()):
+                yield f"{self.name}{_format_labels(self.labels, label_values)} {item:g}"
+        elif value is not None:
+            yield f"{self.name} {value:g}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+CONVERSION_SECONDS = REGISTRY.register(Histogram(
+    'filemaster_conversion_seconds', '实际执行的转换耗时（不含缓存命中）', ['converter']))
+CONVERSIONS = REGISTRY.register(Counter(
+    'filemaster_conversions_total', '转换次数', ['converter', 'status']))
+FAILURES = REGISTRY.register(Counter(
+    'filemaster_conversion_failures_total', '转换失败次数，按错误类型统计', ['converter', 'error']))
+INPUT_BYTES = REGISTRY.register(Counter(
+    'filemaster_conversion_input_bytes_total', '转换输入字节数', ['converter']))
+OUTPUT_BYTES = REGISTRY.register(Counter(
+    'filemaster_conversion_output_bytes_total', '转换输出字节数', ['converter']))
+SUBPROCESS_SECONDS = REGISTRY.register(Counter(
+    'filemaster_conversion_subprocess_seconds_total', '等待外部工具（soffice/pandoc）的时间', ['converter', 'tool']))
+PYTHON_SECONDS = REGISTRY.register(Counter(
+    'filemaster_conversion_python_seconds_total', '转换耗时中除外部工具以外的部分', ['converter']))
+QUEUE_WAIT_SECONDS = REGISTRY.register(Histogram(
+    'filemaster_job_queue_wait_seconds', '后台任务从提交到开始执行的等待时间', ['converter'], QUEUE_BUCKETS))
+
+# 当前线程正在执行的转换：{'converter': 类型, 'subprocess': {工具: 秒}}
+_current = threading.local()
+
+
+@contextmanager
+def track_conversion(converter_type: str, input_path: str, output_path: str):
+    """记录一次转换的耗时、字节数、结果和外部工具时间
+
+    with 块内把结果写入 record['result']；抛出的异常按类名计入失败次数。
+    """
+    record = {'converter': converter_type, 'subprocess': {}, 'result': False, 'error': None}
+    previous = getattr(_current, 'record', None)
+    _current.record = record
+    start = time.perf_counter()
+    error = None
+    try:
+        yield record
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        _current.record = previous
+        elapsed = time.perf_counter() - start
+        CONVERSION_SECONDS.observe(elapsed, converter_type)
+        subprocess_total = 0.0
+        for tool, seconds in record['subprocess'].items():
+            SUBPROCESS_SECONDS.inc(converter_type, tool, amount=seconds)
+            subprocess_total += seconds
+        PYTHON_SECONDS.inc(converter_type, amount=max(elapsed - subprocess_total, 0.0))
+        _count_bytes(INPUT_BYTES, converter_type, input_path)
+        if error is None and record['result']:
+            CONVERSIONS.inc(converter_type, 'success')
+            _count_bytes(OUTPUT_BYTES, converter_type, output_path)
+        else:
+            CONVERSIONS.inc(converter_type, 'failure')
+            # 转换器自行捕获的异常通过 record_error 记录，都没有时记为 ConversionFailed
+            FAILURES.inc(converter_type, error or record['error'] or 'ConversionFailed')
+
+
+def _count_bytes(counter, converter_type, path):
+    try:
+        counter.inc(converter_type, amount=os.path.getsize(path))
+    except (OSError, TypeError):
+        pass
+
+
+def record_error(error):
+    """记录被转换器捕获的异常类型（异常对象或类名），作为当前转换的失败原因"""
+    record = getattr(_current, 'record', None)
+    if record is not None and not record['error']:
+        record['error'] = error if isinstance(error, str) else type(error).__name__
+
+
+@contextmanager
+def capture_errors():
+    """在进程池工作进程中收集 record_error 记录的异常类型，由主进程转记到当前转换"""
+    record = {'subprocess': {}, 'error': None}
+    previous = getattr(_current, 'record', None)
+    _current.record = record
+    try:
+        yield record
+    finally:
+        _current.record = previous
+
+
+@contextmanager
+def subprocess_timer(tool: str):
+    """统计外部工具的耗时，计入当前线程正在执行的转换"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record = getattr(_current, 'record', None)
+        if record is not None:
+            record['subprocess'][tool] = record['subprocess'].get(tool, 0.0) + time.perf_counter() - start
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def metrics_route(path: str = '/metrics'):
+    """提供指标的 Starlette 路由，通过 Gradio launch 的 app_kwargs 挂载到 Web 应用上"""
+    from starlette.responses import Response
+    from starlette.routing import Route
+
+    def endpoint(request):
+        return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+    return Route(path, endpoint, methods=['GET'])
+
+
+def start_metrics_server(host: str, port: int):
+    """在后台线程中的独立端口提供 /metrics，端口被占用时只记录警告"""
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.warning(f"指标服务启动失败（{host}:{port}）: {str(e)}")
+        return None
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    logger.info(f"指标服务已启动: http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,106 @@
+import os
+import io
+import json
+import time
+import uuid
+import random
+import pstats
+import cProfile
+import threading
+import tracemalloc
+import logging
+from contextlib import contextmanager
+
+from config import Config
+from cache import file_sha256
+
+logger = logging.getLogger(__name__)
+
+# 摘要中保留的函数和内存分配条目数
+TOP_ENTRIES = 30
+
+# 同一时刻只能有一个 cProfile 处于启用状态
+_profile_lock = threading.Lock()
+
+
+def sampled() -> bool:
+    """按配置判断本次转换是否需要性能分析，关闭时只有两次属性读取"""
+    config = Config()
+    if config.PROFILE_CONVERSIONS:
+        return True
+    rate = config.PROFILE_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+@contextmanager
+def profile_conversion(converter_type: str, input_path: str, record: dict, wait: bool = False):
+    """用 cProfile 和 tracemalloc 分析一次转换，结果保存到 PROFILES_DIR
+
+    record 为 metrics.track_conversion 的记录，用于读取外部工具耗时。
+    已有其他转换在分析时，wait 为 False 则直接执行不做分析。
+    """
+    if not _profile_lock.acquire(blocking=wait):
+        logger.info(f"已有转换在进行性能分析，跳过: {input_path}")
+        yield
+        return
+
+    try:
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+            try:
+                path = save_profile(converter_type, input_path, profiler, snapshot,
+                                    elapsed, peak, dict(record.get('subprocess', {})))
+                logger.info(f"性能分析结果已保存: {path}")
+            except Exception as e:
+                logger.error(f"保存性能分析结果失败: {str(e)}")
+    finally:
+        _profile_lock.release()
+
+
+def save_profile(converter_type, input_path, profiler, snapshot, elapsed, peak_bytes, subprocess_seconds) -> str:
+    """保存 <类型>_<输入哈希>_<时间>_<随机后缀>.prof（pstats 格式）和同名 .json 摘要，返回 .prof 路径"""
+    profiles_dir = Config().PROFILES_DIR
+    os.makedirs(profiles_dir, exist_ok=True)
+    input_hash = file_sha256(input_path)
+    name = f"{converter_type}_{input_hash[:16]}_{time.strftime('%Y%m%d-%H%M%S')}_{uuid.uuid4().hex[:6]}"
+    base = os.path.join(profiles_dir, name.replace('>', '-'))
+
+    profiler.dump_stats(base + '.prof')
+
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(TOP_ENTRIES)
+    filters = (tracemalloc.Filter(False, tracemalloc.__file__),)
+    allocations = snapshot.filter_traces(filters).statistics('lineno')[:TOP_ENTRIES]
+    subprocess_total = sum(subprocess_seconds.values())
+    summary = {
+        'converter': converter_type,
+        'input': os.path.basename(input_path),
+        'input_sha256': input_hash,
+        'input_bytes': os.path.getsize(input_path),
+        'wall_seconds': round(elapsed, 4),
+        'subprocess_seconds': {tool: round(seconds, 4) for tool, seconds in subprocess_seconds.items()},
+        'python_seconds': round(max(elapsed - subprocess_total, 0.0), 4),
+        'peak_traced_mb': round(peak_bytes / 1024 / 1024, 2),
+        'top_allocations': [
+            {'location': str(stat.traceback[0]), 'size_kb': round(stat.size / 1024, 1), 'count': stat.count}
+            for stat in allocations
+        ],
+        'top_functions': stream.getvalue(),
+    }
+    with open(base + '.json', 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return base + '.prof'
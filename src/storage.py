@@ -0,0 +1,234 @@
+import os
+import time
+import uuid
+import errno
+import shutil
+import threading
+import logging
+from collections import Counter
+from contextlib import contextmanager
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 没有 fcntl，无法使用 reflink
+    fcntl = None
+
+# Linux ioctl FICLONE：在 Btrfs / XFS 等文件系统上创建共享数据块的副本（写时复制）
+FICLONE = 0x40049409
+
+# 无法链接时的错误，遇到这些错误改为复制
+_LINK_ERRORS = {errno.EXDEV, errno.EPERM, errno.EACCES, errno.EMLINK, errno.ENOTSUP,
+                errno.EOPNOTSUPP, errno.EINVAL, errno.ENOTTY, errno.ENOSYS}
+
+
+def _reflink(source: str, target: str):
+    if fcntl is None:
+        raise OSError(errno.ENOTSUP, "不支持 reflink")
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.remove(target)
+            raise
+
+
+def ingest_file(source: str, target: str, move: bool = False) -> str:
+    """把上传的文件放到 target，尽量避免复制数据
+
+    move 为 True 时表示源文件可以被移走，优先直接重命名；否则依次尝试
+    硬链接、reflink，都不支持（例如跨文件系统）时才复制。
+    转换器不会原地修改输入文件，所以与源文件共享数据是安全的。
+    返回实际使用的方式：rename / hardlink / reflink / copy。
+    """
+    if move:
+        try:
+            os.replace(source, target)
+            return _finish_ingest('rename', source, target)
+        except OSError as e:
+            if e.errno not in _LINK_ERRORS:
+                raise
+
+    # 先链接到同目录下的临时名称再替换，target 已存在时与复制一样覆盖
+    temp_path = f"{target}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        for name, method in (('hardlink', os.link), ('reflink', _reflink)):
+            try:
+                method(source, temp_path)
+                break
+            except OSError as e:
+                if e.errno not in _LINK_ERRORS:
+                    raise
+        else:
+            name = 'copy'
+            shutil.copyfile(source, temp_path)
+        os.replace(temp_path, target)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return _finish_ingest(name, source, target)
+
+
+def _finish_ingest(name: str, source: str, target: str) -> str:
+    # 保留时间从放入数据目录开始计算（硬链接会同时更新源文件的时间，不影响使用）
+    os.utime(target)
+    logger.debug(f"{name}: {source} -> {target}")
+    return name
+
+
+# 正在使用的文件和目录，清理时跳过
+_held = Counter()
+_held_lock = threading.Lock()
+
+
+@contextmanager
+def hold(*paths):
+    """在 with 块内保护这些文件或目录（含其中的文件）不被清理"""
+    paths = [os.path.abspath(path) for path in paths if path]
+    with _held_lock:
+        _held.update(paths)
+    try:
+        yield
+    finally:
+        with _held_lock:
+            _held.subtract(paths)
+            for path in paths:
+                if _held[path] <= 0:
+                    del _held[path]
+
+
+def held_paths() -> set:
+    with _held_lock:
+        return set(_held)
+
+
+class Janitor:
+    """按保留时间和总大小清理数据目录
+
+    - 修改时间早于 ttl 秒的文件直接删除
+    - 目录总大小超过 max_bytes 时从最旧的文件开始删除
+    - 正在使用的文件（hold 保护的路径和 in_use 返回的路径及其子路径）不会被删除
+    - 删除文件后清理超过 ttl 的空子目录
+    """
+
+    def __init__(self, directories: dict, policies: dict, interval: float, in_use=None):
+        # directories: {名称: 路径}，policies: {名称: {'ttl': 秒, 'max_bytes': 字节}}
+        self.directories = {name: os.path.abspath(path) for name, path in directories.items()}
+        self.policies = policies
+        self.interval = interval
+        self.in_use = in_use
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _protected(self) -> set:
+        paths = held_paths()
+        if self.in_use is not None:
+            try:
+                paths.update(os.path.abspath(path) for path in self.in_use())
+            except Exception as e:
+                logger.error(f"获取正在使用的文件失败: {str(e)}")
+        return paths
+
+    @staticmethod
+    def _is_protected(path: str, root: str, protected: set) -> bool:
+        while True:
+            if path in protected:
+                return True
+            if path == root:
+                return False
+            parent = os.path.dirname(path)
+            if parent == path:
+                return False
+            path = parent
+
+    def sweep(self) -> dict:
+        """执行一次清理，返回 {名称: (删除文件数, 释放字节数)}"""
+        protected = self._protected()
+        now = time.time()
+        summary = {}
+        for name, root in self.directories.items():
+            policy = self.policies.get(name) or {}
+            if os.path.isdir(root):
+                summary[name] = self._sweep_directory(root, policy, protected, now)
+        return summary
+
+    def _sweep_directory(self, root, policy, protected, now):
+        ttl = policy.get('ttl')
+        max_bytes = policy.get('max_bytes')
+
+        files = []
+        total = 0
+        for dir_path, _, file_names in os.walk(root):
+            for file_name in file_names:
+                path = os.path.join(dir_path, file_name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        files.sort()
+
+        removed, freed = 0, 0
+        for mtime, size, path in files:
+            expired = ttl is not None and now - mtime > ttl
+            over_quota = max_bytes is not None and total > max_bytes
+            if not expired and not over_quota:
+                # 按时间排序，后面的文件更新
+                break
+            if self._is_protected(path, root, protected):
+                continue
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"删除 {path} 失败: {str(e)}")
+                continue
+            total -= size
+            removed += 1
+            freed += size
+
+        if ttl is not None:
+            self._remove_empty_dirs(root, ttl, protected, now)
+        if removed:
+            logger.info(f"清理 {root}: 删除 {removed} 个文件，释放 {freed / 1024 / 1024:.1f}MB")
+        return removed, freed
+
+    def _remove_empty_dirs(self, root, ttl, protected, now):
+        for dir_path, dir_names, file_names in os.walk(root, topdown=False):
+            if dir_path == root or file_names or self._is_protected(dir_path, root, protected):
+                continue
+            try:
+                if not os.listdir(dir_path) and now - os.stat(dir_path).st_mtime > ttl:
+                    os.rmdir(dir_path)
+            except OSError:
+                pass
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"清理数据目录失败: {str(e)}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='janitor', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+def start_janitor(directories: dict, in_use=None):
+    """按 Config.RETENTION_POLICIES 启动后台清理线程，RETENTION_INTERVAL 为 None 时不启动"""
+    config = Config()
+    if config.RETENTION_INTERVAL is None:
+        return None
+    return Janitor(directories, config.RETENTION_POLICIES, config.RETENTION_INTERVAL, in_use).start()
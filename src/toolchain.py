@@ -0,0 +1,122 @@
+import shutil
+import threading
+import subprocess
+import logging
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# LaTeX 引擎按优先级查找
+LATEX_ENGINES = ['xelatex', 'pdflatex', 'lualatex']
+
+
+class Toolchain:
+    """外部工具的探测结果"""
+
+    def __init__(self, name: str, path: str = None, version: str = None):
+        self.name = name
+        self.path = path
+        self.version = version
+
+    @property
+    def available(self) -> bool:
+        return self.path is not None
+
+    def __repr__(self):
+        return f"Toolchain({self.name!r}, path={self.path!r}, version={self.version!r})"
+
+
+def _read_version(path: str, timeout: float = 30) -> str:
+    """执行 `<工具> --version`，返回输出的第一行"""
+    try:
+        result = subprocess.run([path, '--version'], capture_output=True, text=True, timeout=timeout)
+        lines = (result.stdout or result.stderr).strip().splitlines()
+        return lines[0].strip() if lines else None
+    except Exception:
+        return None
+
+
+def _probe_soffice(override: str = None) -> Toolchain:
+    from converters.soffice import find_soffice
+    path = override or find_soffice()
+    return Toolchain('soffice', path, _read_version(path) if path else None)
+
+
+def _probe_pandoc(override: str = None) -> Toolchain:
+    path = override
+    if not path:
+        try:
+            import pypandoc
+            path = pypandoc.get_pandoc_path()
+        except (ImportError, OSError):
+            path = shutil.which('pandoc')
+    return Toolchain('pandoc', path, _read_version(path) if path else None)
+
+
+def _probe_latex(override: str = None) -> Toolchain:
+    path = override
+    if not path:
+        path = next(filter(None, (shutil.which(engine) for engine in LATEX_ENGINES)), None)
+    return Toolchain('latex', path, _read_version(path) if path else None)
+
+
+_PROBES = {
+    'soffice': _probe_soffice,
+    'pandoc': _probe_pandoc,
+    'latex': _probe_latex,
+}
+
+
+class ToolchainRegistry:
+    """soffice、pandoc、LaTeX 的路径和版本
+
+    第一次访问时探测一次，之后直接返回缓存结果；Config.TOOLCHAIN_PATHS
+    变化时自动重新探测。
+    """
+
+    def __init__(self):
+        self._tools = None
+        self._overrides = None
+        self._lock = threading.Lock()
+
+    def probe(self, force: bool = False) -> dict:
+        """返回 {名称: Toolchain}"""
+        overrides = dict(Config().TOOLCHAIN_PATHS or {})
+        tools = self._tools
+        if tools is not None and not force and overrides == self._overrides:
+            return tools
+
+        with self._lock:
+            if self._tools is None or force or overrides != self._overrides:
+                tools = {name: probe(overrides.get(name)) for name, probe in _PROBES.items()}
+                for tool in tools.values():
+                    if tool.available:
+                        logger.info(f"检测到 {tool.name}: {tool.path} ({tool.version})")
+                    else:
+                        logger.warning(f"未检测到 {tool.name}，相关转换不可用")
+                self._tools = tools
+                self._overrides = overrides
+            return self._tools
+
+    def refresh(self) -> dict:
+        """重新探测所有工具，例如安装了新软件之后"""
+        return self.probe(force=True)
+
+    def get(self, name: str) -> Toolchain:
+        return self.probe().get(name) or Toolchain(name)
+
+    def path(self, name: str) -> str:
+        return self.get(name).path
+
+    def available(self, name: str) -> bool:
+        """name 为 None 表示纯 Python 实现，始终可用"""
+        return name is None or self.get(name).available
+
+
+_registry = ToolchainRegistry()
+
+
+def get_toolchains() -> ToolchainRegistry:
+    """获取全局工具探测结果"""
+    return _registry